@@ -8,13 +8,19 @@ if %errorlevel% neq 0 exit /b %errorlevel%
 echo [2/4] Compiling C++ Tree Engine...
 g++ -c src/cpp/fz_engine.cpp -o src/cpp/fz_engine.o -I src/cpp -I src/fortran
 if %errorlevel% neq 0 exit /b %errorlevel%
+g++ -c src/cpp/fz_connect4.cpp -o src/cpp/fz_connect4.o -I src/cpp
+if %errorlevel% neq 0 exit /b %errorlevel%
+g++ -c src/cpp/fz_snapshot.cpp -o src/cpp/fz_snapshot.o -I src/cpp
+if %errorlevel% neq 0 exit /b %errorlevel%
+g++ -c src/cpp/fz_export.cpp -o src/cpp/fz_export.o -I src/cpp
+if %errorlevel% neq 0 exit /b %errorlevel%
 
 echo [3/4] Compiling C Bridge...
 g++ -c src/c_api/fz_bridge.cpp -o src/c_api/fz_bridge.o -I src/cpp
 if %errorlevel% neq 0 exit /b %errorlevel%
 
 echo [4/4] Linking FluxZero DLL...
-g++ -shared -o fluxzero.dll src/fortran/fz_graph.o src/cpp/fz_engine.o src/c_api/fz_bridge.o -static -lgfortran -lquadmath
+g++ -shared -o fluxzero.dll src/fortran/fz_graph.o src/cpp/fz_engine.o src/cpp/fz_connect4.o src/cpp/fz_snapshot.o src/cpp/fz_export.o src/c_api/fz_bridge.o -static -lgfortran -lquadmath
 if %errorlevel% neq 0 exit /b %errorlevel%
 
 echo --- Build Success! Created fluxzero.dll ---
@@ -1,126 +1,209 @@
-import ctypes
 import os
-import platform
-
-# Determine Library Name based on OS
-system = platform.system()
-lib_name = "fluxzero.dll"
-if system == "Linux":
-    lib_name = "libfluxzero.so"
-elif system == "Darwin": # macOS
-    lib_name = "libfluxzero.dylib"
-
-# Load Library
-# 1. Try local package directory (Preferred for pip install)
-_lib_path = os.path.join(os.path.dirname(__file__), lib_name)
-
-try:
-    _lib = ctypes.CDLL(_lib_path)
-except OSError as e:
-    # 2. Fallback: Try finding it in path or working directory (Dev mode)
-    try:
-        if system == "Windows":
-             _lib = ctypes.CDLL(os.path.abspath(lib_name))
-        else:
-             _lib = ctypes.CDLL(lib_name)
-    except OSError:
-        # 3. Try parent directory (Old dev layout)
-        try: 
-            parent_lib = os.path.join(os.path.dirname(__file__), "..", "..", lib_name)
-            _lib = ctypes.CDLL(os.path.abspath(parent_lib))
-        except OSError:
-             raise OSError(f"Could not load FluxZero library ({lib_name}). Ensure g++ and gfortran are installed and the package was built correctly. Error: {e}")
+from ._native import lib
 
-# Define Arg Types
-_lib.FZ_CreateTree.restype = ctypes.c_void_p
-_lib.FZ_DestroyTree.argtypes = [ctypes.c_void_p]
+# Nothing native happens at import: the shared library is loaded on first use
+# (see _native.py), and ctypes-backed helpers below are resolved lazily.
+_LAZY_EXPORTS = {
+    "NativeEnv": "env", "CallbackEnv": "env", "connect4_env": "env", "_EnvVTable": "env",
+    "_NodeRecord": "export", "NODE_FIELDS": "export", "EXPORT_FORMATS": "export",
+    "export_format": "export", "iter_record_batches": "export",
+}
 
-_lib.FZ_CreateNode.argtypes = [ctypes.c_void_p, ctypes.c_int]
-_lib.FZ_CreateNode.restype = ctypes.c_int
+def __getattr__(name):
+    # Backward compatibility: fluxzero._lib used to be loaded at import time
+    if name == "_lib":
+        return lib()
+    if name in _LAZY_EXPORTS:
+        import importlib
+        return getattr(importlib.import_module("." + _LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module 'fluxzero' has no attribute '{name}'")
 
-_lib.FZ_AddChild.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int]
+def _peek_count(filename):
+    # Node count from a .flux header; OSError for missing or foreign files
+    count = lib().FZ_PeekFileCount(filename.encode('utf-8'))
+    if count < 0:
+        raise OSError(f"[FluxZero] Not a readable .flux file: {filename}")
+    return count
 
-_lib.FZ_SelectLeaf.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_double]
-_lib.FZ_SelectLeaf.restype = ctypes.c_int
+def _id_array(n, values=()):
+    """Node ID buffer for the native API (IDs are 64-bit, fz_id in fz_engine.hpp)."""
+    import ctypes
+    return (ctypes.c_int64 * max(n, 1))(*values)
 
-_lib.FZ_Backprop.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_double, ctypes.c_double]
+MERGE_STRATEGIES = {"visit_weighted": 0, "max_visits": 1, "mean": 2}
 
-_lib.FZ_GetVisits.argtypes = [ctypes.c_void_p, ctypes.c_int]
-_lib.FZ_GetVisits.restype = ctypes.c_int
+def _merge_strategy(name):
+    if name not in MERGE_STRATEGIES:
+        raise ValueError(f"Unknown merge strategy '{name}'. Choose from {sorted(MERGE_STRATEGIES)}")
+    return MERGE_STRATEGIES[name]
 
-_lib.FZ_GetBestChild.argtypes = [ctypes.c_void_p, ctypes.c_int]
-_lib.FZ_GetBestChild.restype = ctypes.c_int
+def _read_meta(filename):
+    """Loads the pickled '.meta' sidecar of a .flux file ({} if missing/unreadable)."""
+    import pickle
+    meta_path = filename + ".meta"
+    if not os.path.exists(meta_path): return {}
+    try:
+        with open(meta_path, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"[FluxZero] Warning: Failed to load metadata: {e}")
+        return {}
 
-_lib.FZ_GetChildren.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.c_int]
-_lib.FZ_GetChildren.restype = ctypes.c_int
+def _fetch_ids(func, *args, guess=64):
+    """Calls a native 'count + buffer' query, retrying once if the guess was too small."""
+    buf = _id_array(guess)
+    count = func(*args, buf, guess)
+    if count <= 0: return []
+    if count > guess:
+        buf = _id_array(count)
+        count = func(*args, buf, count)
+    return buf[:count]
 
 class FluidTree:
     def __init__(self):
-        self._ptr = _lib.FZ_CreateTree()
+        self._lib = lib() # Loads and binds the native library on first use
+        self._ptr = self._lib.FZ_CreateTree()
         
     def __del__(self):
         if hasattr(self, '_ptr') and self._ptr:
-            _lib.FZ_DestroyTree(self._ptr)
+            self._lib.FZ_DestroyTree(self._ptr)
             
-    def create_node(self, parent_id):
-        return _lib.FZ_CreateNode(self._ptr, parent_id)
+    def create_node(self, parent_id, action=None):
+        node_id = self._lib.FZ_CreateNode(self._ptr, parent_id)
+        if action is not None and node_id >= 0:
+            self._lib.FZ_SetAction(self._ptr, node_id, action)
+        return node_id
         
     def add_child(self, parent_id, child_id):
-        _lib.FZ_AddChild(self._ptr, parent_id, child_id)
+        self._lib.FZ_AddChild(self._ptr, parent_id, child_id)
+        
+    def set_action(self, node_id, action):
+        """Labels the edge into node_id with a move/direction (used by native search)."""
+        self._lib.FZ_SetAction(self._ptr, node_id, action)
+        
+    def get_action(self, node_id):
+        return self._lib.FZ_GetAction(self._ptr, node_id)
         
     def select_leaf(self, start_node, exploration=1.414):
-        return _lib.FZ_SelectLeaf(self._ptr, start_node, exploration)
+        return self._lib.FZ_SelectLeaf(self._ptr, start_node, exploration)
         
     def backprop(self, leaf_node, reward, lr=0.1):
-        _lib.FZ_Backprop(self._ptr, leaf_node, reward, lr)
+        self._lib.FZ_Backprop(self._ptr, leaf_node, reward, lr)
         
-    # Persistence
-    _lib.FZ_Save.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
-    _lib.FZ_Save.restype = None
-
-    _lib.FZ_Load.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
-    _lib.FZ_Load.restype = None
-
-class FluidTree:
-    def __init__(self):
-        self._ptr = _lib.FZ_CreateTree()
+    def run_search(self, root, env, n_sims, exploration=1.414, lr=0.1, n_threads=1):
+        """
+        Runs a full Fluid Tree Search from 'root' inside the engine.
         
-    def __del__(self):
-        if hasattr(self, '_ptr') and self._ptr:
-            _lib.FZ_DestroyTree(self._ptr)
+        Select, expand, rollout and backprop all happen in native code; children
+        are created on demand and labelled with their move (see get_action).
+        
+        Args:
+            root (int): Node representing env's root state.
+            env (NativeEnv): Environment + root state (e.g. connect4_env()).
+            n_sims (int): Number of simulations.
+            n_threads (int): Worker threads. Only helps with native environments.
             
-    def create_node(self, parent_id):
-        return _lib.FZ_CreateNode(self._ptr, parent_id)
+        Returns:
+            int: Simulations completed.
+        """
+        done = self._lib.FZ_RunSearch(self._ptr, root, env._vtable, env._state, n_sims, exploration, lr, n_threads)
+        if done < 0:
+            raise RuntimeError(f"[FluxZero] Search failed: {self._lib.FZ_GetLastError().decode()}")
+        return done
         
-    def add_child(self, parent_id, child_id):
-        _lib.FZ_AddChild(self._ptr, parent_id, child_id)
+    def get_best_child(self, node_id):
+        return self._lib.FZ_GetBestChild(self._ptr, node_id)
         
-    def select_leaf(self, start_node, exploration=1.414):
-        return _lib.FZ_SelectLeaf(self._ptr, start_node, exploration)
+    def best_children(self, node_ids, by="visits"):
+        """
+        Best child of every node in node_ids with a single native call
+        (e.g. policy extraction over many states). Lookups by visits are O(1):
+        the argmax is maintained incrementally during backprop. Lookups by
+        conductivity scan the children unless index_conductivity() is on.
         
-    def backprop(self, leaf_node, reward, lr=0.1):
-        _lib.FZ_Backprop(self._ptr, leaf_node, reward, lr)
+        Args:
+            node_ids: Sequence of node IDs, or a NumPy integer array.
+            by (str): 'visits' (most visited) or 'conductivity'.
+            
+        Returns:
+            list[int] (NumPy int64 array if node_ids is an array); -1 where a node has no children.
+        """
+        if by not in ("visits", "conductivity"):
+            raise ValueError(f"Unknown criterion '{by}'. Choose 'visits' or 'conductivity'")
+        by_cond = int(by == "conductivity")
         
-    def get_best_child(self, node_id):
-        return _lib.FZ_GetBestChild(self._ptr, node_id)
+        if hasattr(node_ids, "__array_interface__"):
+            import ctypes
+            import numpy as np
+            ids = np.ascontiguousarray(node_ids, dtype=np.int64)
+            out = np.empty_like(ids)
+            self._lib.FZ_BestChildren(self._ptr, ids.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)), ids.size,
+                                      out.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)), by_cond)
+            return out
+            
+        n = len(node_ids)
+        ids = _id_array(n, node_ids)
+        out = _id_array(n)
+        self._lib.FZ_BestChildren(self._ptr, ids, n, out, by_cond)
+        return out[:n]
+        
+    def index_conductivity(self, enabled=True):
+        """
+        Keeps an O(1) best-child index by conductivity too (one extra ID per
+        node, updated during backprop). Off by default.
+        """
+        self._lib.FZ_SetConductivityIndex(self._ptr, int(enabled))
         
     def get_visits(self, node_id):
-        return _lib.FZ_GetVisits(self._ptr, node_id)
+        return self._lib.FZ_GetVisits(self._ptr, node_id)
+        
+    def get_conductivity(self, node_id):
+        return self._lib.FZ_GetCond(self._ptr, node_id)
         
     def get_children(self, node_id):
         # 1. Get Count
-        count = _lib.FZ_GetChildren(self._ptr, node_id, None, 0)
+        count = self._lib.FZ_GetChildren(self._ptr, node_id, None, 0)
         if count <= 0: return []
         
         # 2. Get Data
-        ArrayType = ctypes.c_int * count
-        buf = ArrayType()
-        _lib.FZ_GetChildren(self._ptr, node_id, buf, count)
+        buf = _id_array(count)
+        self._lib.FZ_GetChildren(self._ptr, node_id, buf, count)
         return list(buf)
+
+    # --- Interpretability: Ancestry & Subtrees ---
+    def depth(self, node_id):
+        """Distance from node_id to its root (root = 0). Returns -1 for invalid IDs."""
+        return self._lib.FZ_Depth(self._ptr, node_id)
+
+    def path_to_root(self, node_id):
+        """Returns [node_id, parent, ..., root]: the chain that explains a decision."""
+        return _fetch_ids(self._lib.FZ_PathToRoot, self._ptr, node_id)
+
+    def subtree_ids(self, node_id, max_depth=-1):
+        """Returns all node IDs under node_id (inclusive) in breadth-first order.
+
+        Args:
+            node_id (int): Subtree root.
+            max_depth (int): Levels below node_id to include. -1 means unbounded.
+        """
+        return _fetch_ids(self._lib.FZ_SubtreeIds, self._ptr, node_id, max_depth, guess=1024)
+
+    def lca(self, a, b):
+        """Lowest common ancestor of two nodes, or -1 if they live in different trees."""
+        return self._lib.FZ_LCA(self._ptr, a, b)
+
+    def is_ancestor(self, a, b):
+        """True if a lies on the path from b to its root (a node is its own ancestor)."""
+        return bool(self._lib.FZ_IsAncestor(self._ptr, a, b))
+
+    def build_index(self):
+        """Builds the Euler-tour index so is_ancestor/lca checks are O(1).
+        The index is dropped whenever nodes are created or loaded; call again to refresh."""
+        self._lib.FZ_BuildIndex(self._ptr)
         
     def save(self, filename):
         b_name = filename.encode('utf-8')
-        _lib.FZ_Save(self._ptr, b_name)
+        self._lib.FZ_Save(self._ptr, b_name)
         
         # PERSISTENCE UPGRADE: Save Metadata/Map if exists
         # We look for a 'metadata' attribute or 'node_map' attribute on the instance
@@ -138,19 +221,153 @@ class FluidTree:
         
     def load(self, filename):
         b_name = filename.encode('utf-8')
-        _lib.FZ_Load(self._ptr, b_name)
+        if self._lib.FZ_Load(self._ptr, b_name) < 0:
+            raise OSError(f"[FluxZero] Load failed: {self._lib.FZ_GetLastError().decode()}")
         
         # PERSISTENCE UPGRADE: Load Metadata/Map
-        import pickle
-        meta_path = filename + ".meta"
-        if os.path.exists(meta_path):
-            try:
-                with open(meta_path, "rb") as f:
-                    meta = pickle.load(f)
-                    if 'node_map' in meta: self.node_map = meta['node_map']
-                    if 'root' in meta: self.root = meta['root']
-            except Exception as e:
-                print(f"[FluxZero] Warning: Failed to load metadata: {e}")
+        meta = _read_meta(filename)
+        if 'node_map' in meta: self.node_map = meta['node_map']
+        if 'root' in meta: self.root = meta['root']
+        
+    def __len__(self):
+        return self._lib.FZ_NodeCount(self._ptr)
+
+    # --- Forgetting ---
+    def decay(self, factor):
+        """
+        Fades old erosion for non-stationary workloads: every node's visits and
+        its conductivity's distance from the 0.5 prior are scaled by factor.
+        O(1) regardless of tree size; nodes pick up the factor lazily when touched.
+        
+        Args:
+            factor (float): In (0, 1]. e.g. 0.9 per epoch.
+        """
+        if self._lib.FZ_Decay(self._ptr, factor) < 0:
+            raise ValueError(f"[FluxZero] {self._lib.FZ_GetLastError().decode()}")
+            
+    def materialize_decay(self):
+        """Optional full pass that applies all pending decay to every node now."""
+        self._lib.FZ_MaterializeDecay(self._ptr)
+
+    # --- Streaming Export ---
+    def iter_nodes(self, chunk_size=65536):
+        """
+        Yields NumPy record batches (id, parent, visits, conductivity, action)
+        of up to chunk_size nodes, in ID order. Requires NumPy.
+        Each batch is read under a short lock; use snapshot().iter_nodes() for
+        a view that is consistent across batches while training runs.
+        """
+        from .export import iter_record_batches
+        yield from iter_record_batches(self._lib.FZ_ExportRange, self._ptr, chunk_size)
+        
+    def export(self, filename, format=None, chunk_size=65536):
+        """
+        Streams every node to a CSV / JSON-lines / Graphviz DOT file natively.
+        Memory use is one chunk, independent of tree size.
+        
+        Args:
+            filename (str): Output path.
+            format (str): 'csv', 'jsonl' or 'dot'. Inferred from the extension if None.
+            
+        Returns:
+            int: Number of nodes written.
+        """
+        from .export import export_format, check_chunk_size
+        written = self._lib.FZ_ExportFile(self._ptr, filename.encode('utf-8'), export_format(filename, format),
+                                          check_chunk_size(chunk_size))
+        if written < 0:
+            raise OSError(f"[FluxZero] Export failed: {self._lib.FZ_GetLastError().decode()}")
+        return written
+
+    # --- Frozen Snapshots (Serving) ---
+    def snapshot(self):
+        """Returns an immutable FluxSnapshot of the tree as it is right now."""
+        handle = self._lib.FZ_Snapshot(self._ptr)
+        if not handle:
+            raise RuntimeError(f"[FluxZero] Snapshot failed: {self._lib.FZ_GetLastError().decode()}")
+        return FluxSnapshot(handle)
+        
+    def publish(self):
+        """
+        Freezes the tree and atomically makes it the current snapshot (RCU-style).
+        Readers that already hold an older snapshot keep using it undisturbed.
+        
+        Returns:
+            int: Version of the published snapshot (1, 2, ...; unpublished
+            snapshots from snapshot() are version 0).
+        """
+        return self._lib.FZ_PublishSnapshot(self._ptr)
+        
+    def current_snapshot(self):
+        """Latest published FluxSnapshot, or None if publish() was never called."""
+        handle = self._lib.FZ_AcquireSnapshot(self._ptr)
+        return FluxSnapshot(handle) if handle else None
+        
+    def reserve(self, n_nodes):
+        """
+        Pre-allocates room for n_nodes so growth never allocates mid-search.
+        Nodes live in fixed chunks and are never relocated, so reserving is
+        optional: it only moves the allocation cost up front.
+        """
+        self._lib.FZ_Reserve(self._ptr, n_nodes)
+        
+    def capacity(self):
+        return self._lib.FZ_Capacity(self._ptr)
+
+    # --- Shard Merging ---
+    def merge(self, other, strategy="visit_weighted"):
+        """
+        Folds another FluidTree (e.g. a shard trained in parallel) into this one.
+        
+        Nodes are matched by the path of edge actions from the root; visits are
+        summed and conductivities combined by 'strategy'. Roots other than node 0
+        are matched through shared node_map keys (the state hash), then node_map
+        entries from 'other' are remapped into this tree.
+        
+        Args:
+            other (FluidTree): Shard to merge. Left unchanged.
+            strategy (str): 'visit_weighted' (default), 'max_visits' or 'mean'.
+        """
+        other_map = getattr(other, 'node_map', None)
+        pairs, n_pairs = self._root_pairs(other_map)
+        count = len(other)
+        id_map = _id_array(count)
+        if self._lib.FZ_Merge(self._ptr, other._ptr, _merge_strategy(strategy), pairs, n_pairs,
+                              id_map, count) < 0:
+            raise RuntimeError(f"[FluxZero] Merge failed: {self._lib.FZ_GetLastError().decode()}")
+        self._adopt_node_map(other_map, id_map)
+        
+    def merge_file(self, filename, strategy="visit_weighted"):
+        """
+        Streaming version of merge(): reads a .flux shard record by record, so
+        only this tree plus an ID map for the shard is held in memory.
+        Picks up the shard's .meta node_map if present.
+        """
+        count = _peek_count(filename)
+        other_map = _read_meta(filename).get('node_map')
+        pairs, n_pairs = self._root_pairs(other_map)
+        id_map = _id_array(count)
+        if self._lib.FZ_MergeFile(self._ptr, filename.encode('utf-8'), _merge_strategy(strategy),
+                             pairs, n_pairs, id_map, count) < 0:
+            raise RuntimeError(f"[FluxZero] Merge failed: {self._lib.FZ_GetLastError().decode()}")
+        self._adopt_node_map(other_map, id_map)
+        
+    def _root_pairs(self, other_map):
+        # Flat [other_id, self_id, ...] for keys both trees know
+        own_map = getattr(self, 'node_map', None)
+        if not own_map or not other_map: return None, 0
+        flat = []
+        for key, other_id in other_map.items():
+            if key in own_map:
+                flat += [other_id, own_map[key]]
+        return _id_array(len(flat), flat), len(flat) // 2
+        
+    def _adopt_node_map(self, other_map, id_map):
+        if not other_map: return
+        if not hasattr(self, 'node_map'): self.node_map = {}
+        for key, other_id in other_map.items():
+            if key not in self.node_map and 0 <= other_id < len(id_map):
+                self.node_map[key] = id_map[other_id]
 
     # --- Robustness Features ---
     def traverse_fuzzy(self, start_node, moves, move_map_access_func, tolerance=1):
@@ -196,3 +413,98 @@ class FluidTree:
                 else:
                     return -1
         return curr
+
+    def traverse_beam(self, start_node, moves, tolerance=1, beam_width=8, cond_weight=0.5, n_dirs=8):
+        """
+        Native multi-hypothesis version of traverse_fuzzy.
+        
+        Instead of committing to the closest direction at each step, keeps the
+        'beam_width' best partial paths, so a "splash" into a neighboring pipe can
+        still succeed when the greedy branch dead-ends later.
+        Children are matched by their edge action (see create_node(..., action=)).
+        
+        Args:
+            start_node (int): Starting Node ID.
+            moves (list): List of moves (integers 0-7 for directions).
+            tolerance (int): Max difference in direction to accept per step.
+            beam_width (int): Partial matches kept per step (bounds the work).
+            cond_weight (float): Bonus per unit of conductivity along the path.
+                                 Keep < 1 so an exact step always beats a fuzzy one.
+            n_dirs (int): Size of the circular direction space (0 = linear distance).
+            
+        Returns:
+            list: [(node_id, score), ...] best first. Empty if every path was lost.
+        """
+        moves = list(moves)
+        beam_width = max(1, beam_width)
+        import ctypes
+        move_buf = (ctypes.c_int * max(len(moves), 1))(*moves)
+        nodes = _id_array(beam_width)
+        scores = (ctypes.c_double * beam_width)()
+        count = self._lib.FZ_TraverseBeam(self._ptr, start_node, move_buf, len(moves), tolerance, n_dirs,
+                                     beam_width, cond_weight, nodes, scores, beam_width)
+        if count <= 0: return []
+        return list(zip(nodes[:count], scores[:count]))
+
+class FluxSnapshot:
+    """
+    Read-only, compact view of a FluidTree (see FluidTree.snapshot / publish).
+    
+    Queries take no locks, so any number of threads can serve from one snapshot
+    while training continues on the live tree.
+    """
+    def __init__(self, handle):
+        self._lib = lib()
+        self._handle = handle
+        self._release = self._lib.FZ_ReleaseSnapshot
+        
+    def __del__(self):
+        if getattr(self, '_handle', None):
+            self._release(self._handle)
+            self._handle = None
+            
+    def __len__(self):
+        return self._lib.FZ_Snap_Size(self._handle)
+        
+    @property
+    def version(self):
+        return self._lib.FZ_Snap_Version(self._handle)
+        
+    def get_visits(self, node_id):
+        return self._lib.FZ_Snap_GetVisits(self._handle, node_id)
+        
+    def get_conductivity(self, node_id):
+        return self._lib.FZ_Snap_GetCond(self._handle, node_id)
+        
+    def get_action(self, node_id):
+        return self._lib.FZ_Snap_GetAction(self._handle, node_id)
+        
+    def get_parent(self, node_id):
+        return self._lib.FZ_Snap_GetParent(self._handle, node_id)
+        
+    def depth(self, node_id):
+        return self._lib.FZ_Snap_Depth(self._handle, node_id)
+        
+    def get_best_child(self, node_id):
+        return self._lib.FZ_Snap_GetBestChild(self._handle, node_id)
+        
+    def get_children(self, node_id):
+        return _fetch_ids(self._lib.FZ_Snap_GetChildren, self._handle, node_id, guess=16)
+        
+    def path_to_root(self, node_id):
+        return _fetch_ids(self._lib.FZ_Snap_PathToRoot, self._handle, node_id)
+        
+    def iter_nodes(self, chunk_size=65536):
+        """Same as FluidTree.iter_nodes, from this frozen view."""
+        # Generator frame keeps self (and so the native handle) alive
+        from .export import iter_record_batches
+        yield from iter_record_batches(self._lib.FZ_Snap_ExportRange, self._handle, chunk_size)
+        
+    def export(self, filename, format=None, chunk_size=65536):
+        """Same as FluidTree.export, from this frozen view."""
+        from .export import export_format, check_chunk_size
+        written = self._lib.FZ_Snap_ExportFile(self._handle, filename.encode('utf-8'), export_format(filename, format),
+                                               check_chunk_size(chunk_size))
+        if written < 0:
+            raise OSError(f"[FluxZero] Export failed: {self._lib.FZ_GetLastError().decode()}")
+        return written
@@ -0,0 +1,70 @@
+import argparse
+import sys
+
+def _fail(error):
+    message = str(error)
+    if message.startswith("[FluxZero] "): message = message[len("[FluxZero] "):]
+    print(f"[FluxZero] Error: {message}", file=sys.stderr)
+    return 1
+
+def cmd_merge(args):
+    """Folds shards into one tree: the first is loaded, the rest are streamed in."""
+    from . import FluidTree, _peek_count
+    
+    try:
+        # Every input is checked up front, so a bad shard fails before any work
+        for path in args.inputs:
+            _peek_count(path)
+            
+        tree = FluidTree()
+        tree.load(args.inputs[0])
+        print(f"[FluxZero] {args.inputs[0]}: {len(tree)} nodes")
+        for path in args.inputs[1:]:
+            tree.merge_file(path, strategy=args.strategy)
+            print(f"[FluxZero] + {path}: {len(tree)} nodes")
+            
+        tree.save(args.output)
+    except (OSError, RuntimeError) as e:
+        return _fail(e)
+    print(f"[FluxZero] Merged {len(args.inputs)} shards into {args.output}")
+    return 0
+
+def cmd_export(args):
+    """Streams a .flux file to CSV / JSON-lines / DOT without building Python objects."""
+    from . import FluidTree, _peek_count
+    
+    try:
+        _peek_count(args.input)
+        tree = FluidTree()
+        tree.load(args.input)
+        written = tree.export(args.output, format=args.format, chunk_size=args.chunk_size)
+    except (OSError, RuntimeError) as e:
+        return _fail(e)
+    print(f"[FluxZero] Exported {written} nodes to {args.output}")
+    return 0
+
+def main(argv=None):
+    from . import MERGE_STRATEGIES, EXPORT_FORMATS
+    parser = argparse.ArgumentParser(prog="fluxzero", description="FluxZero command line tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    merge = sub.add_parser("merge", help="Merge .flux shards trained in parallel")
+    merge.add_argument("inputs", nargs="+", help="Input .flux files")
+    merge.add_argument("-o", "--output", required=True, help="Output .flux file")
+    merge.add_argument("--strategy", default="visit_weighted", choices=sorted(MERGE_STRATEGIES),
+                       help="How conductivities are combined (visits are always summed)")
+    merge.set_defaults(func=cmd_merge)
+    
+    export = sub.add_parser("export", help="Stream a .flux file to CSV / JSON-lines / DOT")
+    export.add_argument("input", help="Input .flux file")
+    export.add_argument("-o", "--output", required=True, help="Output file")
+    export.add_argument("--format", choices=sorted(EXPORT_FORMATS), default=None,
+                        help="Output format (default: from the output extension)")
+    export.add_argument("--chunk-size", type=int, default=65536, help="Nodes per streamed chunk")
+    export.set_defaults(func=cmd_export)
+    
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
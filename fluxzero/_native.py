@@ -0,0 +1,222 @@
+import os
+import sys
+
+# --- Native Library Loading (lazy) ---
+# Nothing is loaded at import time: the first lib() call locates the shared
+# library once, loads it and declares the ctypes signatures. Short-lived
+# workers that never touch the engine pay nothing.
+
+LIB_ENV_VAR = "FLUXZERO_LIB" # Explicit path to the shared library (skips the search)
+
+_lib = None
+_lib_path = None
+
+def lib_name():
+    if sys.platform == "win32": return "fluxzero.dll"
+    if sys.platform == "darwin": return "libfluxzero.dylib"
+    return "libfluxzero.so"
+
+def library_path():
+    """
+    Path of the shared library, resolved once and cached:
+    1. $FLUXZERO_LIB
+    2. The package directory (pip install)
+    3. Working directory (dev mode)
+    4. Parent directory (old dev layout)
+    5. The bare name, left to the system loader (LD_LIBRARY_PATH, system lib dirs)
+    """
+    global _lib_path
+    if _lib_path is None:
+        name = lib_name()
+        here = os.path.dirname(__file__)
+        override = os.environ.get(LIB_ENV_VAR)
+        if override:
+            _lib_path = override
+        else:
+            candidates = [os.path.join(here, name), os.path.abspath(name),
+                          os.path.abspath(os.path.join(here, "..", "..", name))]
+            _lib_path = next((c for c in candidates if os.path.exists(c)), name)
+    return _lib_path
+
+def lib():
+    """The loaded library with all signatures declared (loads on first call)."""
+    global _lib
+    if _lib is None:
+        import ctypes
+        path = library_path()
+        try:
+            dll = ctypes.CDLL(path)
+        except OSError as e:
+            raise OSError(f"Could not load FluxZero library ({path}). Ensure g++ and gfortran are installed "
+                          f"and the package was built correctly, or set {LIB_ENV_VAR}. Error: {e}") from e
+        _bind(dll)
+        _lib = dll
+    return _lib
+
+def _bind(dll):
+    import ctypes
+    from .env import _EnvVTable
+    from .export import _NodeRecord
+    
+    # Node IDs, visit counts and buffer lengths are 64-bit (fz_id in fz_engine.hpp)
+    _id_t = ctypes.c_int64
+    
+    dll.FZ_CreateTree.restype = ctypes.c_void_p
+    dll.FZ_DestroyTree.argtypes = [ctypes.c_void_p]
+
+    dll.FZ_Save.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    dll.FZ_Save.restype = None
+
+    dll.FZ_Load.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    dll.FZ_Load.restype = ctypes.c_int
+
+    dll.FZ_CreateNode.argtypes = [ctypes.c_void_p, _id_t]
+    dll.FZ_CreateNode.restype = _id_t
+
+    dll.FZ_AddChild.argtypes = [ctypes.c_void_p, _id_t, _id_t]
+
+    dll.FZ_SetAction.argtypes = [ctypes.c_void_p, _id_t, ctypes.c_int]
+    dll.FZ_GetAction.argtypes = [ctypes.c_void_p, _id_t]
+    dll.FZ_GetAction.restype = ctypes.c_int
+
+    dll.FZ_SelectLeaf.argtypes = [ctypes.c_void_p, _id_t, ctypes.c_double]
+    dll.FZ_SelectLeaf.restype = _id_t
+
+    dll.FZ_Backprop.argtypes = [ctypes.c_void_p, _id_t, ctypes.c_double, ctypes.c_double]
+
+    dll.FZ_GetVisits.argtypes = [ctypes.c_void_p, _id_t]
+    dll.FZ_GetVisits.restype = ctypes.c_int64
+
+    dll.FZ_GetCond.argtypes = [ctypes.c_void_p, _id_t]
+    dll.FZ_GetCond.restype = ctypes.c_double
+
+    dll.FZ_GetBestChild.argtypes = [ctypes.c_void_p, _id_t]
+    dll.FZ_GetBestChild.restype = _id_t
+
+    dll.FZ_BestChildren.argtypes = [ctypes.c_void_p, ctypes.POINTER(_id_t), ctypes.c_int64, ctypes.POINTER(_id_t), ctypes.c_int]
+    dll.FZ_BestChildren.restype = ctypes.c_int64
+
+    dll.FZ_SetConductivityIndex.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    dll.FZ_SetConductivityIndex.restype = None
+
+    dll.FZ_GetChildren.argtypes = [ctypes.c_void_p, _id_t, ctypes.POINTER(_id_t), ctypes.c_int64]
+    dll.FZ_GetChildren.restype = ctypes.c_int64
+
+    # In-Engine Search
+    dll.FZ_RunSearch.argtypes = [ctypes.c_void_p, _id_t, ctypes.POINTER(_EnvVTable), ctypes.c_void_p,
+                                 ctypes.c_int, ctypes.c_double, ctypes.c_double, ctypes.c_int]
+    dll.FZ_RunSearch.restype = ctypes.c_int
+
+    dll.FZ_Connect4Env.restype = ctypes.POINTER(_EnvVTable)
+    dll.FZ_Connect4New.argtypes = [ctypes.POINTER(ctypes.c_int), ctypes.c_int]
+    dll.FZ_Connect4New.restype = ctypes.c_void_p
+    dll.FZ_ReleaseEnvState.argtypes = [ctypes.POINTER(_EnvVTable), ctypes.c_void_p]
+
+    dll.FZ_GetLastError.restype = ctypes.c_char_p
+
+    # Robust Matching
+    dll.FZ_TraverseBeam.argtypes = [ctypes.c_void_p, _id_t, ctypes.POINTER(ctypes.c_int), ctypes.c_int,
+                                    ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_double,
+                                    ctypes.POINTER(_id_t), ctypes.POINTER(ctypes.c_double), ctypes.c_int]
+    dll.FZ_TraverseBeam.restype = ctypes.c_int
+
+    # Ancestry & Subtree Queries
+    dll.FZ_Depth.argtypes = [ctypes.c_void_p, _id_t]
+    dll.FZ_Depth.restype = ctypes.c_int
+
+    dll.FZ_PathToRoot.argtypes = [ctypes.c_void_p, _id_t, ctypes.POINTER(_id_t), ctypes.c_int64]
+    dll.FZ_PathToRoot.restype = ctypes.c_int64
+
+    dll.FZ_SubtreeIds.argtypes = [ctypes.c_void_p, _id_t, ctypes.c_int, ctypes.POINTER(_id_t), ctypes.c_int64]
+    dll.FZ_SubtreeIds.restype = ctypes.c_int64
+
+    dll.FZ_LCA.argtypes = [ctypes.c_void_p, _id_t, _id_t]
+    dll.FZ_LCA.restype = _id_t
+
+    dll.FZ_IsAncestor.argtypes = [ctypes.c_void_p, _id_t, _id_t]
+    dll.FZ_IsAncestor.restype = ctypes.c_int
+
+    dll.FZ_BuildIndex.argtypes = [ctypes.c_void_p]
+    dll.FZ_BuildIndex.restype = None
+
+    # Frozen Snapshots
+    dll.FZ_Snapshot.argtypes = [ctypes.c_void_p]
+    dll.FZ_Snapshot.restype = ctypes.c_void_p
+    dll.FZ_PublishSnapshot.argtypes = [ctypes.c_void_p]
+    dll.FZ_PublishSnapshot.restype = ctypes.c_int64
+    dll.FZ_AcquireSnapshot.argtypes = [ctypes.c_void_p]
+    dll.FZ_AcquireSnapshot.restype = ctypes.c_void_p
+    dll.FZ_ReleaseSnapshot.argtypes = [ctypes.c_void_p]
+    dll.FZ_ReleaseSnapshot.restype = None
+
+    dll.FZ_Snap_Size.argtypes = [ctypes.c_void_p]
+    dll.FZ_Snap_Size.restype = ctypes.c_int64
+
+    dll.FZ_Snap_Version.argtypes = [ctypes.c_void_p]
+    dll.FZ_Snap_Version.restype = ctypes.c_int64
+
+    dll.FZ_Snap_GetVisits.argtypes = [ctypes.c_void_p, _id_t]
+    dll.FZ_Snap_GetVisits.restype = ctypes.c_int64
+
+    dll.FZ_Snap_GetCond.argtypes = [ctypes.c_void_p, _id_t]
+    dll.FZ_Snap_GetCond.restype = ctypes.c_double
+
+    dll.FZ_Snap_GetAction.argtypes = [ctypes.c_void_p, _id_t]
+    dll.FZ_Snap_GetAction.restype = ctypes.c_int
+
+    dll.FZ_Snap_GetParent.argtypes = [ctypes.c_void_p, _id_t]
+    dll.FZ_Snap_GetParent.restype = _id_t
+
+    dll.FZ_Snap_Depth.argtypes = [ctypes.c_void_p, _id_t]
+    dll.FZ_Snap_Depth.restype = ctypes.c_int
+
+    dll.FZ_Snap_GetBestChild.argtypes = [ctypes.c_void_p, _id_t]
+    dll.FZ_Snap_GetBestChild.restype = _id_t
+
+    dll.FZ_Snap_GetChildren.argtypes = [ctypes.c_void_p, _id_t, ctypes.POINTER(_id_t), ctypes.c_int64]
+    dll.FZ_Snap_GetChildren.restype = ctypes.c_int64
+
+    dll.FZ_Snap_PathToRoot.argtypes = [ctypes.c_void_p, _id_t, ctypes.POINTER(_id_t), ctypes.c_int64]
+    dll.FZ_Snap_PathToRoot.restype = ctypes.c_int64
+
+    # Bulk Export
+    dll.FZ_ExportRange.argtypes = [ctypes.c_void_p, _id_t, ctypes.POINTER(_NodeRecord), ctypes.c_int64]
+    dll.FZ_ExportRange.restype = ctypes.c_int64
+
+    dll.FZ_Snap_ExportRange.argtypes = [ctypes.c_void_p, _id_t, ctypes.POINTER(_NodeRecord), ctypes.c_int64]
+    dll.FZ_Snap_ExportRange.restype = ctypes.c_int64
+
+    dll.FZ_ExportFile.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int, ctypes.c_int64]
+    dll.FZ_ExportFile.restype = ctypes.c_int64
+
+    dll.FZ_Snap_ExportFile.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int, ctypes.c_int64]
+    dll.FZ_Snap_ExportFile.restype = ctypes.c_int64
+
+    # Forgetting
+    dll.FZ_Decay.argtypes = [ctypes.c_void_p, ctypes.c_double]
+    dll.FZ_Decay.restype = ctypes.c_int
+
+    dll.FZ_MaterializeDecay.argtypes = [ctypes.c_void_p]
+    dll.FZ_MaterializeDecay.restype = None
+
+    # Capacity
+    dll.FZ_Reserve.argtypes = [ctypes.c_void_p, ctypes.c_int64]
+    dll.FZ_Reserve.restype = None
+
+    dll.FZ_Capacity.argtypes = [ctypes.c_void_p]
+    dll.FZ_Capacity.restype = ctypes.c_int64
+
+    # Shard Merging
+    dll.FZ_NodeCount.argtypes = [ctypes.c_void_p]
+    dll.FZ_NodeCount.restype = ctypes.c_int64
+
+    dll.FZ_PeekFileCount.argtypes = [ctypes.c_char_p]
+    dll.FZ_PeekFileCount.restype = ctypes.c_int64
+
+    dll.FZ_Merge.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int, ctypes.POINTER(_id_t), ctypes.c_int64,
+                             ctypes.POINTER(_id_t), ctypes.c_int64]
+    dll.FZ_Merge.restype = ctypes.c_int
+
+    dll.FZ_MergeFile.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int, ctypes.POINTER(_id_t), ctypes.c_int64,
+                                 ctypes.POINTER(_id_t), ctypes.c_int64]
+    dll.FZ_MergeFile.restype = ctypes.c_int64
@@ -0,0 +1,120 @@
+import ctypes
+import itertools
+from ._native import lib
+
+# --- Environment Plugin ABI (mirrors FZ_Env in src/cpp/fz_env.hpp) ---
+_CloneFunc = ctypes.CFUNCTYPE(ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p)
+_ReleaseFunc = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_void_p)
+_LegalFunc = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.c_int, ctypes.c_void_p)
+_StepFunc = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p)
+_TerminalFunc = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(ctypes.c_double), ctypes.c_void_p)
+_ToMoveFunc = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+class _EnvVTable(ctypes.Structure):
+    _fields_ = [
+        ("clone", _CloneFunc),
+        ("release", _ReleaseFunc),
+        ("legal_moves", _LegalFunc),
+        ("step", _StepFunc),
+        ("terminal_value", _TerminalFunc),
+        ("to_move", _ToMoveFunc),
+        ("user", ctypes.c_void_p),
+    ]
+
+class NativeEnv:
+    """
+    A root state plus the function table that drives it.
+    
+    Passed to FluidTree.run_search so the whole search loop stays in native code.
+    The state handle is owned by this object and released when it is garbage collected.
+    
+    Args:
+        vtable (POINTER(_EnvVTable)): Function table (from a shared library or ctypes).
+        state (int): Opaque handle to the root state.
+    """
+    def __init__(self, vtable, state):
+        self._vtable = vtable
+        self._state = state
+        self._release = lib().FZ_ReleaseEnvState # Bound now: imports fail during shutdown
+        
+    def __del__(self):
+        if getattr(self, '_state', None):
+            self._release(self._vtable, self._state)
+            self._state = None
+
+def connect4_env(moves=()):
+    """
+    Reference Connect-4 (bitboard) environment, implemented natively.
+    
+    Args:
+        moves (list): Columns (0-6) played so far from the empty board.
+        
+    Returns:
+        NativeEnv: Values are reported for the side to move after 'moves'
+                   (1.0 win, 0.5 draw, 0.0 loss).
+    """
+    dll = lib()
+    moves = list(moves)
+    buf = (ctypes.c_int * max(len(moves), 1))(*moves)
+    return NativeEnv(dll.FZ_Connect4Env(), dll.FZ_Connect4New(buf, len(moves)))
+
+class CallbackEnv(NativeEnv):
+    """
+    Wraps a pure-Python environment in the native ABI via ctypes callbacks.
+    
+    Useful for prototyping: every callback re-enters Python, so expect Python speed
+    for the rollout itself (and no gain from n_threads > 1).
+    
+    Args:
+        state: Root state object.
+        clone (func): state -> independent copy.
+        legal_moves (func): state -> list of int moves.
+        step (func): (state, move) -> None. Mutates state in place.
+        terminal_value (func): state -> None if not terminal, else value in [0, 1]
+                               for the side to move at the root state.
+        to_move (func): state -> index of the player to move. Set it for two-player
+                        games so each move is credited from its player's side.
+                        None = single agent (the root side makes every move).
+    """
+    def __init__(self, state, clone, legal_moves, step, terminal_value, to_move=None):
+        self._states = {}
+        self._handles = itertools.count(1) # next() is atomic under the GIL
+        
+        def _clone(handle, user):
+            return self._register(clone(self._states[handle]))
+            
+        def _release(handle, user):
+            self._states.pop(handle, None)
+            
+        def _legal(handle, out, max_len, user):
+            moves = legal_moves(self._states[handle])
+            for i, m in enumerate(moves[:max_len]):
+                out[i] = m
+            return len(moves)
+            
+        def _step(handle, move, user):
+            step(self._states[handle], move)
+            
+        def _terminal(handle, value, user):
+            v = terminal_value(self._states[handle])
+            if v is None: return 0
+            value[0] = v
+            return 1
+            
+        def _to_move(handle, user):
+            return to_move(self._states[handle])
+        
+        # Keep the callback objects alive as long as the table is in use
+        self._table = _EnvVTable(_CloneFunc(_clone), _ReleaseFunc(_release), _LegalFunc(_legal),
+                                 _StepFunc(_step), _TerminalFunc(_terminal),
+                                 _ToMoveFunc(_to_move) if to_move else _ToMoveFunc(), None)
+        super().__init__(ctypes.pointer(self._table), self._register(state))
+        
+    def _register(self, state):
+        handle = next(self._handles)
+        self._states[handle] = state
+        return handle
+        
+    def __del__(self):
+        # Python-owned states need no native release
+        self._state = None
@@ -0,0 +1,56 @@
+import ctypes
+import os
+
+# --- Bulk Export (mirrors FZ_NodeRecord in src/cpp/fz_snapshot.hpp) ---
+class _NodeRecord(ctypes.Structure):
+    _fields_ = [
+        ("id", ctypes.c_int64),
+        ("parent", ctypes.c_int64),
+        ("visits", ctypes.c_int64),
+        ("conductivity", ctypes.c_double),
+        ("action", ctypes.c_int32),
+    ]
+
+# NumPy layout of one record (aligned like the C struct, 40 bytes)
+NODE_FIELDS = [("id", "<i8"), ("parent", "<i8"), ("visits", "<i8"), ("conductivity", "<f8"), ("action", "<i4")]
+
+EXPORT_FORMATS = {"csv": 0, "jsonl": 1, "dot": 2}
+
+def export_format(filename, format=None):
+    """Resolves an export format name (inferred from the extension if not given)."""
+    if format is None:
+        format = os.path.splitext(filename)[1].lstrip(".").lower()
+        if format == "json": format = "jsonl"
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{format}'. Choose from {sorted(EXPORT_FORMATS)}")
+    return EXPORT_FORMATS[format]
+
+def check_chunk_size(chunk_size):
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    return chunk_size
+
+def iter_record_batches(export_range, handle, chunk_size):
+    """
+    Yields NumPy record arrays of up to chunk_size nodes, in ID order.
+    The native side writes straight into each batch; only one batch is alive
+    per step unless the caller keeps references.
+    """
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError("iter_nodes requires NumPy (pip install numpy). "
+                          "Use export() for NumPy-free streaming output.") from e
+    check_chunk_size(chunk_size)
+    
+    dtype = np.dtype(NODE_FIELDS, align=True)
+    if dtype.itemsize != ctypes.sizeof(_NodeRecord):
+        raise RuntimeError("[FluxZero] Node record layout mismatch between NumPy and the native library")
+    
+    start = 0
+    while True:
+        batch = np.empty(chunk_size, dtype=dtype)
+        n = export_range(handle, start, batch.ctypes.data_as(ctypes.POINTER(_NodeRecord)), chunk_size)
+        if n <= 0: return
+        yield batch[:n]
+        start += n
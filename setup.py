@@ -73,6 +73,9 @@ setup(
         "Topic :: Scientific/Engineering :: Artificial Intelligence",
     ],
     python_requires='>=3.6',
+    entry_points={
+        'console_scripts': ['fluxzero=fluxzero.__main__:main']
+    },
     cmdclass={
         'build_py': CustomBuildPy,
         'install': CustomInstall
@@ -1,6 +1,16 @@
 #include "fz_engine.hpp"
+#include "fz_export.hpp"
 #include <string>
 #include <cstring>
+#include <memory>
+
+// Snapshot handles box a shared_ptr so a reader keeps its snapshot alive
+// even after the tree publishes a newer one.
+typedef std::shared_ptr<const FluxSnapshot> SnapshotHandle;
+
+static const FluxSnapshot* snap_of(void* handle) {
+    return handle ? static_cast<SnapshotHandle*>(handle)->get() : nullptr;
+}
 
 // Global Error Buffer (Thread Local would be better but KISS for now)
 static char last_error[256] = {0};
@@ -32,7 +42,7 @@ extern "C" {
         } catch(...) {}
     }
     
-    int FZ_CreateNode(void* ptr, int parent) {
+    int64_t FZ_CreateNode(void* ptr, int64_t parent) {
         if(!ptr) { set_error("Null Pointer"); return -1; }
         try {
             return static_cast<FluidTree*>(ptr)->create_node(parent);
@@ -42,7 +52,7 @@ extern "C" {
         }
     }
     
-    void FZ_AddChild(void* ptr, int parent, int child) {
+    void FZ_AddChild(void* ptr, int64_t parent, int64_t child) {
         if(ptr) {
              try {
                  static_cast<FluidTree*>(ptr)->add_child(parent, child);
@@ -52,7 +62,22 @@ extern "C" {
         }
     }
     
-    int FZ_SelectLeaf(void* ptr, int start, double expl) {
+    void FZ_SetAction(void* ptr, int64_t node, int action) {
+        if(ptr) {
+             try {
+                 static_cast<FluidTree*>(ptr)->set_action(node, action);
+             } catch(const std::exception& e) {
+                 set_error(e.what());
+             }
+        }
+    }
+
+    int FZ_GetAction(void* ptr, int64_t node) {
+        if(ptr) return static_cast<FluidTree*>(ptr)->get_action(node);
+        return -1;
+    }
+    
+    int64_t FZ_SelectLeaf(void* ptr, int64_t start, double expl) {
         if(!ptr) return -1;
         try {
             return static_cast<FluidTree*>(ptr)->select_leaf(start, expl);
@@ -62,7 +87,7 @@ extern "C" {
         }
     }
     
-    void FZ_Backprop(void* ptr, int leaf, double reward, double lr) {
+    void FZ_Backprop(void* ptr, int64_t leaf, double reward, double lr) {
          if(ptr) {
              try {
                  static_cast<FluidTree*>(ptr)->backpropagate(leaf, reward, lr);
@@ -70,26 +95,119 @@ extern "C" {
          }
     }
     
-    int FZ_GetVisits(void* ptr, int node) {
+    // --- In-Engine Search ---
+    int FZ_RunSearch(void* ptr, int64_t root, const FZ_Env* env, void* state, int n_sims,
+                     double expl, double lr, int n_threads) {
+        if(!ptr) { set_error("Null Pointer"); return -1; }
+        try {
+            return static_cast<FluidTree*>(ptr)->run_search(root, env, state, n_sims, expl, lr, n_threads);
+        } catch(const std::exception& e) {
+            set_error(e.what());
+            return -1;
+        }
+    }
+
+    const FZ_Env* FZ_Connect4Env() {
+        return fz_connect4_env();
+    }
+
+    void* FZ_Connect4New(const int* moves, int n_moves) {
+        return fz_connect4_new(moves, n_moves);
+    }
+
+    void FZ_ReleaseEnvState(const FZ_Env* env, void* state) {
+        if(env && env->release && state) env->release(state, env->user);
+    }
+    
+    int64_t FZ_GetVisits(void* ptr, int64_t node) {
         if(ptr) return static_cast<FluidTree*>(ptr)->get_visit_count(node);
         return 0;
     }
     
-    double FZ_GetCond(void* ptr, int node) {
+    double FZ_GetCond(void* ptr, int64_t node) {
         if(ptr) return static_cast<FluidTree*>(ptr)->get_conductivity(node);
         return 0.0;
     }
     
-    int FZ_GetBestChild(void* ptr, int node) {
+    int64_t FZ_GetBestChild(void* ptr, int64_t node) {
         if(ptr) return static_cast<FluidTree*>(ptr)->get_best_child(node);
         return -1;
     }
     
-    int FZ_GetChildren(void* ptr, int node, int* out_buf, int max_len) {
+    int64_t FZ_BestChildren(void* ptr, const int64_t* ids, int64_t n, int64_t* out, int by_conductivity) {
+        if(ptr) return static_cast<FluidTree*>(ptr)->best_children(ids, n, out, by_conductivity != 0);
+        return -1;
+    }
+
+    void FZ_SetConductivityIndex(void* ptr, int enabled) {
+        if(ptr) {
+            try {
+                static_cast<FluidTree*>(ptr)->set_conductivity_index(enabled != 0);
+            } catch(const std::exception& e) {
+                set_error(e.what());
+            }
+        }
+    }
+
+    int64_t FZ_GetChildren(void* ptr, int64_t node, int64_t* out_buf, int64_t max_len) {
         if(ptr) return static_cast<FluidTree*>(ptr)->get_children(node, out_buf, max_len);
         return -1;
     }
     
+    // --- Robust Matching ---
+    int FZ_TraverseBeam(void* ptr, int64_t start, const int* moves, int n_moves, int tolerance, int n_dirs,
+                        int beam_width, double cond_weight, int64_t* out_nodes, double* out_scores, int max_len) {
+        if(!ptr) return -1;
+        try {
+            return static_cast<FluidTree*>(ptr)->traverse_beam(start, moves, n_moves, tolerance, n_dirs,
+                                                               beam_width, cond_weight, out_nodes, out_scores, max_len);
+        } catch(const std::exception& e) {
+            set_error(e.what());
+            return -1;
+        }
+    }
+
+    // --- Ancestry & Subtree Queries ---
+    int FZ_Depth(void* ptr, int64_t node) {
+        if(ptr) return static_cast<FluidTree*>(ptr)->depth(node);
+        return -1;
+    }
+
+    int64_t FZ_PathToRoot(void* ptr, int64_t node, int64_t* out_buf, int64_t max_len) {
+        if(ptr) return static_cast<FluidTree*>(ptr)->path_to_root(node, out_buf, max_len);
+        return -1;
+    }
+
+    int64_t FZ_SubtreeIds(void* ptr, int64_t node, int max_depth, int64_t* out_buf, int64_t max_len) {
+        if(!ptr) return -1;
+        try {
+            return static_cast<FluidTree*>(ptr)->subtree_ids(node, max_depth, out_buf, max_len);
+        } catch(const std::exception& e) {
+            set_error(e.what());
+            return -1;
+        }
+    }
+
+    int64_t FZ_LCA(void* ptr, int64_t a, int64_t b) {
+        if(ptr) return static_cast<FluidTree*>(ptr)->lca(a, b);
+        return -1;
+    }
+
+    int FZ_IsAncestor(void* ptr, int64_t a, int64_t b) {
+        if(ptr) return static_cast<FluidTree*>(ptr)->is_ancestor(a, b) ? 1 : 0;
+        return 0;
+    }
+
+    void FZ_BuildIndex(void* ptr) {
+        if(ptr) {
+            try {
+                static_cast<FluidTree*>(ptr)->build_index();
+            } catch(const std::exception& e) {
+                set_error(e.what());
+            }
+        }
+    }
+
     void FZ_Save(void* ptr, const char* filename) {
         if(ptr) {
             try {
@@ -100,13 +218,204 @@ extern "C" {
         }
     }
     
-    void FZ_Load(void* ptr, const char* filename) {
+    // Returns 0, or -1 if the file is corrupt (the tree is left unchanged)
+    int FZ_Load(void* ptr, const char* filename) {
         if(ptr) {
             try {
                 static_cast<FluidTree*>(ptr)->load_from_file(filename);
             } catch(const std::exception& e) {
                 set_error(e.what());
+                return -1;
             }
         }
+        return 0;
+    }
+
+    int64_t FZ_NodeCount(void* ptr) {
+        if(ptr) return static_cast<FluidTree*>(ptr)->node_count();
+        return 0;
+    }
+
+    int64_t FZ_PeekFileCount(const char* filename) {
+        if(!filename) return -1;
+        return FluidTree::peek_file_count(filename);
+    }
+
+    // --- Frozen Snapshots ---
+    void* FZ_Snapshot(void* ptr) {
+        if(!ptr) { set_error("Null Pointer"); return nullptr; }
+        try {
+            return new SnapshotHandle(static_cast<FluidTree*>(ptr)->snapshot());
+        } catch(const std::exception& e) {
+            set_error(e.what());
+            return nullptr;
+        }
+    }
+
+    int64_t FZ_PublishSnapshot(void* ptr) {
+        if(!ptr) { set_error("Null Pointer"); return -1; }
+        try {
+            return (int64_t)static_cast<FluidTree*>(ptr)->publish_snapshot();
+        } catch(const std::exception& e) {
+            set_error(e.what());
+            return -1;
+        }
+    }
+
+    void* FZ_AcquireSnapshot(void* ptr) {
+        if(!ptr) return nullptr;
+        SnapshotHandle snap = static_cast<FluidTree*>(ptr)->current_snapshot();
+        return snap ? new SnapshotHandle(std::move(snap)) : nullptr;
+    }
+
+    void FZ_ReleaseSnapshot(void* handle) {
+        delete static_cast<SnapshotHandle*>(handle);
+    }
+
+    // Snapshot queries take no locks
+    int64_t FZ_Snap_Size(void* handle) {
+        const FluxSnapshot* s = snap_of(handle);
+        return s ? s->size() : 0;
+    }
+
+    int64_t FZ_Snap_Version(void* handle) {
+        const FluxSnapshot* s = snap_of(handle);
+        return s ? (int64_t)s->version() : -1;
+    }
+
+    int64_t FZ_Snap_GetVisits(void* handle, int64_t node) {
+        const FluxSnapshot* s = snap_of(handle);
+        return s ? s->get_visit_count(node) : 0;
+    }
+
+    double FZ_Snap_GetCond(void* handle, int64_t node) {
+        const FluxSnapshot* s = snap_of(handle);
+        return s ? s->get_conductivity(node) : 0.0;
+    }
+
+    int FZ_Snap_GetAction(void* handle, int64_t node) {
+        const FluxSnapshot* s = snap_of(handle);
+        return s ? s->get_action(node) : -1;
+    }
+
+    int64_t FZ_Snap_GetParent(void* handle, int64_t node) {
+        const FluxSnapshot* s = snap_of(handle);
+        return s ? s->get_parent(node) : -1;
+    }
+
+    int FZ_Snap_Depth(void* handle, int64_t node) {
+        const FluxSnapshot* s = snap_of(handle);
+        return s ? s->depth(node) : -1;
+    }
+
+    int64_t FZ_Snap_GetBestChild(void* handle, int64_t node) {
+        const FluxSnapshot* s = snap_of(handle);
+        return s ? s->get_best_child(node) : -1;
+    }
+
+    int64_t FZ_Snap_GetChildren(void* handle, int64_t node, int64_t* out_buf, int64_t max_len) {
+        const FluxSnapshot* s = snap_of(handle);
+        return s ? s->get_children(node, out_buf, max_len) : -1;
+    }
+
+    int64_t FZ_Snap_PathToRoot(void* handle, int64_t node, int64_t* out_buf, int64_t max_len) {
+        const FluxSnapshot* s = snap_of(handle);
+        return s ? s->path_to_root(node, out_buf, max_len) : -1;
+    }
+
+    // --- Bulk Export ---
+    int64_t FZ_ExportRange(void* ptr, int64_t start, FZ_NodeRecord* out, int64_t max_len) {
+        if(ptr) return static_cast<FluidTree*>(ptr)->export_range(start, out, max_len);
+        return 0;
+    }
+
+    int64_t FZ_Snap_ExportRange(void* handle, int64_t start, FZ_NodeRecord* out, int64_t max_len) {
+        const FluxSnapshot* s = snap_of(handle);
+        return s ? s->export_range(start, out, max_len) : 0;
+    }
+
+    int64_t FZ_ExportFile(void* ptr, const char* filename, int format, int64_t chunk_size) {
+        if(!ptr || !filename) { set_error("Null Pointer"); return -1; }
+        FluidTree* tree = static_cast<FluidTree*>(ptr);
+        try {
+            return fz_export_stream(filename, format, [tree](int64_t start, FZ_NodeRecord* out, int64_t max_len) {
+                return tree->export_range(start, out, max_len);
+            }, chunk_size);
+        } catch(const std::exception& e) {
+            set_error(e.what());
+            return -1;
+        }
+    }
+
+    int64_t FZ_Snap_ExportFile(void* handle, const char* filename, int format, int64_t chunk_size) {
+        const FluxSnapshot* s = snap_of(handle);
+        if(!s || !filename) { set_error("Null Pointer"); return -1; }
+        try {
+            return fz_export_stream(filename, format, [s](int64_t start, FZ_NodeRecord* out, int64_t max_len) {
+                return s->export_range(start, out, max_len);
+            }, chunk_size);
+        } catch(const std::exception& e) {
+            set_error(e.what());
+            return -1;
+        }
+    }
+
+    // --- Forgetting ---
+    int FZ_Decay(void* ptr, double factor) {
+        if(!ptr) { set_error("Null Pointer"); return -1; }
+        try {
+            static_cast<FluidTree*>(ptr)->decay(factor);
+            return 0;
+        } catch(const std::exception& e) {
+            set_error(e.what());
+            return -1;
+        }
+    }
+
+    void FZ_MaterializeDecay(void* ptr) {
+        if(ptr) static_cast<FluidTree*>(ptr)->materialize_decay();
+    }
+
+    // --- Capacity ---
+    void FZ_Reserve(void* ptr, int64_t n) {
+        if(ptr) {
+            try {
+                static_cast<FluidTree*>(ptr)->reserve(n);
+            } catch(const std::exception& e) {
+                set_error(e.what());
+            }
+        }
+    }
+
+    int64_t FZ_Capacity(void* ptr) {
+        if(ptr) return static_cast<FluidTree*>(ptr)->capacity();
+        return 0;
+    }
+
+    // --- Shard Merging ---
+    int FZ_Merge(void* ptr, void* other, int strategy, const int64_t* root_pairs, int64_t n_pairs,
+                 int64_t* id_map, int64_t max_len) {
+        if(!ptr || !other) { set_error("Null Pointer"); return -1; }
+        try {
+            static_cast<FluidTree*>(ptr)->merge_from(*static_cast<FluidTree*>(other), strategy, root_pairs, n_pairs,
+                                                     id_map, max_len);
+            return 0;
+        } catch(const std::exception& e) {
+            set_error(e.what());
+            return -1;
+        }
+    }
+
+    int64_t FZ_MergeFile(void* ptr, const char* filename, int strategy, const int64_t* root_pairs, int64_t n_pairs,
+                         int64_t* id_map, int64_t max_len) {
+        if(!ptr) { set_error("Null Pointer"); return -1; }
+        try {
+            int64_t count = static_cast<FluidTree*>(ptr)->merge_file(filename, strategy, root_pairs, n_pairs, id_map, max_len);
+            if(count < 0) set_error("Failed to read shard");
+            return count;
+        } catch(const std::exception& e) {
+            set_error(e.what());
+            return -1;
+        }
     }
 }
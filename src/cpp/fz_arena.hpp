@@ -0,0 +1,81 @@
+#ifndef FZ_ARENA_HPP
+#define FZ_ARENA_HPP
+
+#include <cstdint>
+#include <new>
+#include <stdexcept>
+#include <utility>
+
+// Chunked Arena
+// Elements live in chunks that double in size (BASE, 2*BASE, 4*BASE, ...) and are
+// never moved, so growing the tree never copies existing nodes (no reallocation
+// spikes mid-search) and references stay valid. Index -> (chunk, offset) is O(1).
+template <typename T>
+class ChunkedArena {
+public:
+    static const int BASE_SHIFT = 6;          // First chunk holds 64 elements
+    static const int MAX_CHUNKS = 64 - BASE_SHIFT;
+
+    ChunkedArena() : m_size(0), m_chunks_used(0) {
+        for(int k = 0; k < MAX_CHUNKS; ++k) m_chunks[k] = nullptr;
+    }
+    ~ChunkedArena() {
+        clear();
+        for(int k = 0; k < m_chunks_used; ++k) ::operator delete(m_chunks[k]);
+    }
+    ChunkedArena(const ChunkedArena&) = delete;
+    ChunkedArena& operator=(const ChunkedArena&) = delete;
+
+    int64_t size() const { return m_size; }
+    bool empty() const { return m_size == 0; }
+
+    T& operator[](int64_t i) { return m_chunks[chunk_of(i)][offset_of(i)]; }
+    const T& operator[](int64_t i) const { return m_chunks[chunk_of(i)][offset_of(i)]; }
+
+    void push_back(T&& value) {
+        int k = chunk_of(m_size);
+        if(k >= m_chunks_used) grow_to(k + 1);
+        new (&m_chunks[k][offset_of(m_size)]) T(std::move(value));
+        m_size++;
+    }
+    void push_back(const T& value) { push_back(T(value)); }
+
+    // Allocates (but does not construct) chunks so that n elements fit
+    void reserve(int64_t n) {
+        if(n > 0) grow_to(chunk_of(n - 1) + 1);
+    }
+    int64_t capacity() const {
+        return m_chunks_used ? ((int64_t)1 << (BASE_SHIFT + m_chunks_used)) - ((int64_t)1 << BASE_SHIFT) : 0;
+    }
+
+    // Destroys elements, keeps chunks for reuse
+    void clear() {
+        for(int64_t i = 0; i < m_size; ++i) (*this)[i].~T();
+        m_size = 0;
+    }
+
+private:
+    T* m_chunks[MAX_CHUNKS];
+    int64_t m_size;
+    int m_chunks_used;
+
+    // Chunk k covers [BASE*(2^k - 1), BASE*(2^(k+1) - 1))
+    static int chunk_of(int64_t i) {
+        uint64_t j = (uint64_t)i + ((uint64_t)1 << BASE_SHIFT);
+        return 63 - __builtin_clzll(j) - BASE_SHIFT;
+    }
+    static int64_t offset_of(int64_t i) {
+        int64_t j = i + ((int64_t)1 << BASE_SHIFT);
+        return j - ((int64_t)1 << (BASE_SHIFT + chunk_of(i)));
+    }
+    void grow_to(int n_chunks) {
+        if(n_chunks > MAX_CHUNKS) throw std::length_error("Arena capacity exceeded");
+        for(int k = m_chunks_used; k < n_chunks; ++k) {
+            size_t count = (size_t)1 << (BASE_SHIFT + k);
+            m_chunks[k] = static_cast<T*>(::operator new(count * sizeof(T)));
+            m_chunks_used = k + 1;
+        }
+    }
+};
+
+#endif
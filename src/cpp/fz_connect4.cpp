@@ -0,0 +1,91 @@
+#include "fz_env.hpp"
+#include <cstdint>
+
+// --- Reference Environment: Connect 4 (Bitboard) ---
+// Column-major layout, 7 bits per column (6 rows + 1 sentinel bit).
+// Terminal values are reported for the side to move when the state was created.
+
+static const int C4_ROWS = 6;
+static const int C4_COLS = 7;
+
+struct C4State {
+    uint64_t pos[2];          // Stones per player
+    int heights[C4_COLS];     // Next free row per column
+    int to_move;              // 0 or 1
+    int n_moves;
+    int winner;               // -1 = none
+    int perspective;          // Player the values are reported for
+};
+
+static bool c4_is_win(uint64_t b) {
+    const int shifts[4] = {1, C4_ROWS + 1, C4_ROWS, C4_ROWS + 2}; // |, -, \, /
+    for(int s : shifts) {
+        uint64_t m = b & (b >> s);
+        if(m & (m >> (2 * s))) return true;
+    }
+    return false;
+}
+
+static void* c4_clone(void* state, void*) {
+    return new C4State(*static_cast<C4State*>(state));
+}
+
+static void c4_release(void* state, void*) {
+    delete static_cast<C4State*>(state);
+}
+
+static int c4_legal_moves(void* state, int* out_moves, int max_len, void*) {
+    const C4State* s = static_cast<C4State*>(state);
+    if(s->winner != -1) return 0;
+    int count = 0;
+    for(int c=0; c<C4_COLS; ++c) {
+        if(s->heights[c] < C4_ROWS) {
+            if(count < max_len) out_moves[count] = c;
+            count++;
+        }
+    }
+    return count;
+}
+
+static void c4_step(void* state, int move, void*) {
+    C4State* s = static_cast<C4State*>(state);
+    if(move < 0 || move >= C4_COLS || s->heights[move] >= C4_ROWS || s->winner != -1) return;
+
+    s->pos[s->to_move] |= 1ULL << (move * (C4_ROWS + 1) + s->heights[move]);
+    s->heights[move]++;
+    s->n_moves++;
+    if(c4_is_win(s->pos[s->to_move])) s->winner = s->to_move;
+    s->to_move ^= 1;
+}
+
+static int c4_terminal_value(void* state, double* value, void*) {
+    const C4State* s = static_cast<C4State*>(state);
+    if(s->winner != -1) {
+        *value = (s->winner == s->perspective) ? 1.0 : 0.0;
+        return 1;
+    }
+    if(s->n_moves >= C4_ROWS * C4_COLS) {
+        *value = 0.5; // Draw
+        return 1;
+    }
+    return 0;
+}
+
+static int c4_to_move(void* state, void*) {
+    return static_cast<C4State*>(state)->to_move;
+}
+
+static const FZ_Env c4_env = {c4_clone, c4_release, c4_legal_moves, c4_step, c4_terminal_value, c4_to_move, nullptr};
+
+extern "C" {
+    const FZ_Env* fz_connect4_env() {
+        return &c4_env;
+    }
+
+    void* fz_connect4_new(const int* moves, int n_moves) {
+        C4State* s = new C4State{{0, 0}, {0}, 0, 0, -1, 0};
+        for(int i=0; i<n_moves; ++i) c4_step(s, moves[i], nullptr);
+        s->perspective = s->to_move;
+        return s;
+    }
+}
@@ -3,37 +3,91 @@
 #include <cmath>
 #include <cstdlib>
 #include <algorithm>
+#include <random>
+#include <thread>
+#include <unordered_set>
 
 FluidTree::FluidTree() {
     // Root Node (ID = 0)
-    nodes.push_back({0, 0, 0.5, {}, -1}); 
+    nodes.push_back({0, 0, FZ_PRIOR_CONDUCTIVITY, {}, -1, 0, -1, m_decay_scale});
 }
 
 FluidTree::~FluidTree() {}
 
-int FluidTree::create_node(int parent_id) {
+fz_id FluidTree::create_node(fz_id parent_id) {
     std::lock_guard<std::mutex> lock(m_mutex);
+    return create_node_unlocked(parent_id, -1);
+}
+
+fz_id FluidTree::create_node_unlocked(fz_id parent_id, int action) {
     // Bounds Check Parent
-    if(parent_id >= (int)nodes.size()) throw std::runtime_error("Parent ID out of bounds");
+    if(parent_id >= nodes.size()) throw std::runtime_error("Parent ID out of bounds");
     
-    int id = nodes.size();
-    nodes.push_back({id, 0, 0.5, {}, parent_id});
+    fz_id id = nodes.size();
+    int d = (parent_id >= 0) ? nodes[parent_id].depth + 1 : 0;
+    nodes.push_back({id, 0, FZ_PRIOR_CONDUCTIVITY, {}, parent_id, d, action, m_decay_scale});
+    nodes[id].best_epoch = epoch_tag();
+    if(m_best_cond) m_best_cond->push_back(-1);
+    index_valid = false;
     return id;
 }
 
-void FluidTree::add_child(int parent_id, int child_id) {
+void FluidTree::add_child(fz_id parent_id, fz_id child_id) {
     std::lock_guard<std::mutex> lock(m_mutex);
     if(parent_id < 0 || parent_id >= nodes.size()) throw std::runtime_error("Parent ID invalid");
     if(child_id < 0 || child_id >= nodes.size()) throw std::runtime_error("Child ID invalid");
     
-    nodes[parent_id].children.push_back(child_id);
+    Node& parent = nodes[parent_id];
+    Node& child = nodes[child_id];
+    if(child.parent == parent_id) {
+        link_child(parent, child_id);
+    } else {
+        parent.children.push_back(child_id);
+        parent.best_scan = 1; // Its stats are updated through another parent
+    }
 }
 
-int FluidTree::select_leaf(int start_node, double exploration) {
+void FluidTree::set_action(fz_id node_id, int action) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(!valid_id(node_id)) throw std::runtime_error("Node ID invalid");
+    nodes[node_id].action = action;
+}
+
+int FluidTree::get_action(fz_id node_id) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(!valid_id(node_id)) return -1;
+    return nodes[node_id].action;
+}
+
+fz_id FluidTree::pick_child(const Node& n, double exploration, double r) const {
+    // Use Fortran to pick child
+    int n_child = n.children.size();
+    std::vector<double> conds(n_child);
+    for(int i=0; i<n_child; ++i) {
+        conds[i] = eff_conductivity(nodes[n.children[i]]);
+    }
+    
+    std::vector<double> probs(n_child);
+    fz_calc_flow_probs(n_child, conds.data(), exploration, probs.data());
+    
+    // Sample
+    double cum = 0;
+    int next_idx = n_child - 1; // Safety for float errors
+    for(int i=0; i<n_child; ++i) {
+        cum += probs[i];
+        if(r <= cum) {
+            next_idx = i;
+            break;
+        }
+    }
+    return n.children[next_idx];
+}
+
+fz_id FluidTree::select_leaf(fz_id start_node, double exploration) {
     std::lock_guard<std::mutex> lock(m_mutex);
     if(start_node < 0 || start_node >= nodes.size()) throw std::runtime_error("Start Node Invalid");
     
-    int curr = start_node;
+    fz_id curr = start_node;
     
     while(true) {
         if(curr >= nodes.size()) break;
@@ -43,157 +97,937 @@ int FluidTree::select_leaf(int start_node, double exploration) {
             return curr; // Found a leaf (or terminal)
         }
         
-        // Use Fortran to pick child
-        int n_child = n.children.size();
-        std::vector<double> conds(n_child);
-        for(int i=0; i<n_child; ++i) {
-            conds[i] = nodes[n.children[i]].conductivity;
-        }
-        
-        std::vector<double> probs(n_child);
-        fz_calc_flow_probs(n_child, conds.data(), exploration, probs.data());
-        
-        // Sample
         double r = (double)rand() / RAND_MAX;
-        double cum = 0;
-        int next_idx = 0;
-        for(int i=0; i<n_child; ++i) {
-            cum += probs[i];
-            if(r <= cum) {
-                next_idx = i;
-                break;
-            }
-        }
-        // Safety for float errors
-        if(next_idx >= n_child) next_idx = n_child - 1;
-        
-        curr = n.children[next_idx];
+        curr = pick_child(n, exploration, r);
     }
     return curr;
 }
 
-void FluidTree::backpropagate(int leaf_node, double reward, double learning_rate) {
+void FluidTree::erode(fz_id node_id, double reward, double learning_rate) {
+    Node& n = nodes[node_id];
+    resolve(n);
+    n.visit_count++;
+    
+    // Update Conductivity (Erosion)
+    double old_val = n.conductivity;
+    double new_val;
+    fz_update_conductivity(n.conductivity, reward, learning_rate, &new_val);
+    n.conductivity = new_val;
+    
+    if(n.slot >= 0) offer_child(nodes[n.parent], node_id, old_val);
+}
+
+void FluidTree::backpropagate(fz_id leaf_node, double reward, double learning_rate) {
     std::lock_guard<std::mutex> lock(m_mutex);
     
-    int curr = leaf_node;
+    fz_id curr = leaf_node;
     while(curr != -1) {
-        Node& n = nodes[curr];
-        n.visit_count++;
-        
-        // Update Conductivity (Erosion)
-        double new_val;
-        fz_update_conductivity(n.conductivity, reward, learning_rate, &new_val);
-        n.conductivity = new_val;
-        
-        curr = n.parent;
+        erode(curr, reward, learning_rate);
+        curr = nodes[curr].parent;
     }
 }
 
-int FluidTree::get_visit_count(int node_id) {
-    if(node_id < nodes.size()) return nodes[node_id].visit_count;
+// --- In-Engine Search (Native Environments) ---
+
+void FluidTree::search_worker(fz_id root, const FZ_Env* env, void* root_state, int n_sims,
+                              double exploration, double learning_rate, unsigned seed, int* done) {
+    std::mt19937 rng(seed);
+    std::uniform_real_distribution<double> unit(0.0, 1.0);
+    std::vector<int> moves(64);
+
+    // Fills 'moves' with the legal moves of a state, growing the buffer if needed
+    auto legal = [&](void* state) {
+        int count = env->legal_moves(state, moves.data(), moves.size(), env->user);
+        if(count > (int)moves.size()) {
+            moves.resize(count);
+            count = env->legal_moves(state, moves.data(), moves.size(), env->user);
+        }
+        return count < 0 ? 0 : count;
+    };
+
+    // Per-simulation path and, for each node, the player whose move led to it
+    std::vector<fz_id> path;
+    std::vector<int> movers;
+    auto side_to_move = [&](void* state) { return env->to_move ? env->to_move(state, env->user) : 0; };
+
+    for(int sim = 0; sim < n_sims; ++sim) {
+        void* state = env->clone(root_state, env->user);
+        if(!state) throw std::runtime_error("Environment clone failed");
+
+        fz_id curr = root;
+        int root_player = side_to_move(state);
+        path.assign(1, root);
+        movers.assign(1, root_player);
+        double value = 0.5;
+        bool terminal = env->terminal_value(state, &value, env->user) != 0;
+
+        // 1. Select (descend while the node is expanded)
+        bool expanded_here = false;
+        while(!terminal && !expanded_here) {
+            fz_id next = -1;
+            {
+                std::lock_guard<std::mutex> lock(m_mutex);
+                if(!nodes[curr].children.empty()) {
+                    next = pick_child(nodes[curr], exploration, unit(rng));
+                }
+            }
+
+            // 2. Expand (move generation runs outside the lock)
+            if(next == -1) {
+                int count = legal(state);
+                if(count == 0) break;
+                std::lock_guard<std::mutex> lock(m_mutex);
+                if(nodes[curr].children.empty()) { // Another worker may have expanded it
+                    for(int i=0; i<count; ++i) {
+                        fz_id cid = create_node_unlocked(curr, moves[i]);
+                        link_child(nodes[curr], cid);
+                    }
+                }
+                next = pick_child(nodes[curr], exploration, unit(rng));
+                expanded_here = true;
+            }
+
+            int action;
+            {
+                std::lock_guard<std::mutex> lock(m_mutex);
+                action = nodes[next].action;
+            }
+            if(action < 0) { // Children added by hand without a move: the state would go stale
+                env->release(state, env->user);
+                throw std::runtime_error("Unlabeled edge: search children need an action (create_node(parent, action=...))");
+            }
+            movers.push_back(side_to_move(state));
+            path.push_back(next);
+            env->step(state, action, env->user);
+            curr = next;
+            terminal = env->terminal_value(state, &value, env->user) != 0;
+        }
+
+        // 3. Rollout (uniform random play, no tree access)
+        while(!terminal) {
+            int count = legal(state);
+            if(count == 0) break;
+            std::uniform_int_distribution<int> pick(0, count - 1);
+            env->step(state, moves[pick(rng)], env->user);
+            terminal = env->terminal_value(state, &value, env->user) != 0;
+        }
+        env->release(state, env->user);
+
+        // 4. Backprop (root to leaf; each node is credited from its mover's side)
+        {
+            std::lock_guard<std::mutex> lock(m_mutex);
+            for(size_t i = 0; i < path.size(); ++i) {
+                erode(path[i], movers[i] == root_player ? value : 1.0 - value, learning_rate);
+            }
+        }
+        (*done)++;
+    }
+}
+
+int FluidTree::run_search(fz_id root, const FZ_Env* env, void* root_state, int n_sims,
+                          double exploration, double learning_rate, int n_threads) {
+    if(!env || !env->clone || !env->release || !env->legal_moves || !env->step || !env->terminal_value) {
+        throw std::runtime_error("Incomplete environment");
+    }
+    {
+        std::lock_guard<std::mutex> lock(m_mutex);
+        if(!valid_id(root)) throw std::runtime_error("Root Node Invalid");
+    }
+    if(n_sims <= 0) return 0;
+    if(n_threads < 1) n_threads = 1;
+    if(n_threads > n_sims) n_threads = n_sims;
+
+    unsigned base_seed = std::random_device{}();
+    if(n_threads == 1) {
+        int done = 0;
+        search_worker(root, env, root_state, n_sims, exploration, learning_rate, base_seed, &done);
+        return done;
+    }
+
+    // Split simulations across workers; tree access is serialized by m_mutex,
+    // environment calls (the expensive part) run in parallel.
+    std::vector<std::thread> workers;
+    std::vector<int> done(n_threads, 0);
+    std::vector<std::string> errors(n_threads);
+    for(int t = 0; t < n_threads; ++t) {
+        int share = n_sims / n_threads + (t < n_sims % n_threads ? 1 : 0);
+        workers.emplace_back([&, t, share]() {
+            try {
+                search_worker(root, env, root_state, share, exploration, learning_rate, base_seed + t, &done[t]);
+            } catch(const std::exception& e) {
+                errors[t] = e.what();
+            }
+        });
+    }
+    for(auto& w : workers) w.join();
+    for(const auto& err : errors) {
+        if(!err.empty()) throw std::runtime_error(err);
+    }
+
+    int total = 0;
+    for(int d : done) total += d;
+    return total;
+}
+
+int64_t FluidTree::get_visit_count(fz_id node_id) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(valid_id(node_id)) return eff_visits(nodes[node_id]);
     return 0;
 }
 
-double FluidTree::get_conductivity(int node_id) {
-     if(node_id < nodes.size()) return nodes[node_id].conductivity;
-     return 0.0;
+double FluidTree::get_conductivity(fz_id node_id) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(valid_id(node_id)) return eff_conductivity(nodes[node_id]);
+    return 0.0;
+}
+
+fz_id FluidTree::get_best_child(fz_id node_id) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(!valid_id(node_id)) return -1;
+    return best_child_unlocked(nodes[node_id], false);
+}
+
+int64_t FluidTree::best_children(const fz_id* ids, int64_t n, fz_id* out, bool by_conductivity) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(!ids || !out) return -1;
+    for(int64_t i=0; i<n; ++i) {
+        out[i] = valid_id(ids[i]) ? best_child_unlocked(nodes[ids[i]], by_conductivity) : -1;
+    }
+    return n;
 }
 
-int FluidTree::get_best_child(int node_id) {
+void FluidTree::set_conductivity_index(bool enabled) {
     std::lock_guard<std::mutex> lock(m_mutex);
-    if(node_id >= nodes.size()) return -1;
+    if(enabled == (bool)m_best_cond) return;
+    if(!enabled) { m_best_cond.reset(); return; }
+    m_best_cond.reset(new ChunkedArena<fz_id>());
+    m_best_cond->reserve(nodes.size());
+    for(int64_t i=0; i<nodes.size(); ++i) {
+        m_best_cond->push_back(scan_best_child(nodes[i], true));
+        nodes[i].best_cond_stale = 0;
+    }
+}
+
+// --- Best-Child Index ---
+// Visits only grow between decays, so the visit argmax is updated in O(1)
+// whenever a child changes. Conductivity can also fall: if the current best
+// drops, the node is marked stale and rescanned on its next query. decay()
+// rounds visits and may tie siblings, so each node rescans once per decay epoch.
+// Ties always go to the lowest slot, which is what a scan in list order picks.
+// The conductivity argmax is only kept when m_best_cond is enabled; otherwise
+// conductivity queries scan, and backprop pays nothing for them.
+
+void FluidTree::link_child(Node& parent, fz_id child_id) {
+    Node& child = nodes[child_id];
+    if(child.slot < 0) child.slot = parent.children.size(); // First listing wins
+    parent.children.push_back(child_id);
+    offer_child(parent, child_id, eff_conductivity(child));
+}
+
+void FluidTree::offer_child(Node& parent, fz_id child_id, double old_cond) {
+    if(parent.best_scan || parent.best_epoch != epoch_tag()) return; // Rescanned on query
+    const Node& child = nodes[child_id];
     
-    Node& n = nodes[node_id];
-    if(n.children.empty()) return -1;
+    // Does child beat the current holder (higher value, or equal and listed earlier)?
+    auto beats = [&](fz_id best, bool by_cond) {
+        if(best == -1) return true;
+        const Node& b = nodes[best];
+        if(by_cond) {
+            double c1 = eff_conductivity(child), c2 = eff_conductivity(b);
+            return c1 > c2 || (c1 == c2 && child.slot < b.slot);
+        }
+        int64_t v1 = eff_visits(child), v2 = eff_visits(b);
+        return v1 > v2 || (v1 == v2 && child.slot < b.slot);
+    };
     
-    int best_id = -1;
-    int max_visits = -1;
+    if(parent.best_visits != child_id && beats(parent.best_visits, false)) parent.best_visits = child_id;
     
-    // Robust Move Selection: Pick Most Visited (Standard MCTS practice)
-    for(int child_id : n.children) {
-        if(nodes[child_id].visit_count > max_visits) {
-            max_visits = nodes[child_id].visit_count;
-            best_id = child_id;
+    if(!m_best_cond || parent.best_cond_stale) return;
+    fz_id& best_cond = (*m_best_cond)[parent.id];
+    if(best_cond == child_id) {
+        if(eff_conductivity(child) < old_cond) parent.best_cond_stale = 1;
+    } else if(beats(best_cond, true)) {
+        best_cond = child_id;
+    }
+}
+
+fz_id FluidTree::scan_best_child(const Node& n, bool by_conductivity) const {
+    fz_id best_id = -1;
+    int64_t max_visits = -1;
+    double max_cond = 0.0;
+    for(fz_id child_id : n.children) {
+        const Node& c = nodes[child_id];
+        if(by_conductivity) {
+            double cond = eff_conductivity(c);
+            if(best_id == -1 || cond > max_cond) { max_cond = cond; best_id = child_id; }
+        } else {
+            int64_t v = eff_visits(c);
+            if(v > max_visits) { max_visits = v; best_id = child_id; }
         }
     }
     return best_id;
 }
 
-int FluidTree::get_children(int node_id, int* out_buf, int max_len) {
+fz_id FluidTree::best_child_unlocked(Node& n, bool by_conductivity) {
+    if(n.best_scan) return scan_best_child(n, by_conductivity);
+    if(n.best_epoch != epoch_tag()) {
+        n.best_visits = scan_best_child(n, false);
+        n.best_cond_stale = 1;
+        n.best_epoch = epoch_tag();
+    }
+    if(!by_conductivity) return n.best_visits;
+    if(!m_best_cond) return scan_best_child(n, true);
+    fz_id& best_cond = (*m_best_cond)[n.id];
+    if(n.best_cond_stale) {
+        best_cond = scan_best_child(n, true);
+        n.best_cond_stale = 0;
+    }
+    return best_cond;
+}
+
+void FluidTree::rebuild_best_index() {
+    for(int64_t i=0; i<nodes.size(); ++i) nodes[i].slot = -1;
+    if(m_best_cond) m_best_cond->clear();
+    for(int64_t i=0; i<nodes.size(); ++i) {
+        Node& n = nodes[i];
+        n.best_scan = 0;
+        for(size_t k = 0; k < n.children.size(); ++k) {
+            fz_id child_id = n.children[k];
+            if(!valid_id(child_id)) continue;
+            if(nodes[child_id].parent != i) n.best_scan = 1;
+            else if(nodes[child_id].slot < 0) nodes[child_id].slot = k;
+        }
+        n.best_visits = scan_best_child(n, false);
+        if(m_best_cond) m_best_cond->push_back(scan_best_child(n, true));
+        n.best_cond_stale = 0;
+        n.best_epoch = epoch_tag();
+    }
+}
+
+int64_t FluidTree::get_children(fz_id node_id, fz_id* out_buf, int64_t max_len) {
     std::lock_guard<std::mutex> lock(m_mutex);
     if(node_id < 0 || node_id >= nodes.size()) return -1;
     
     const Node& n = nodes[node_id];
-    int count = n.children.size();
+    int64_t count = n.children.size();
     
     if(out_buf && max_len > 0) {
+        int64_t copy_len = (count < max_len) ? count : max_len;
+        for(int64_t i=0; i<copy_len; ++i) {
+            out_buf[i] = n.children[i];
+        }
+    }
+    return count;
+}
+
+// --- Ancestry & Subtree Queries ---
+
+int FluidTree::depth(fz_id node_id) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(!valid_id(node_id)) return -1;
+    return nodes[node_id].depth;
+}
+
+int64_t FluidTree::path_to_root(fz_id node_id, fz_id* out_buf, int64_t max_len) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(!valid_id(node_id)) return -1;
+
+    // Depth is cached, so the path length is known without walking twice
+    int64_t count = nodes[node_id].depth + 1;
+    if(out_buf && max_len > 0) {
+        fz_id curr = node_id;
+        for(int64_t i=0; i<count && i<max_len && curr != -1; ++i) {
+            out_buf[i] = curr;
+            curr = nodes[curr].parent;
+        }
+    }
+    return count;
+}
+
+int64_t FluidTree::subtree_ids(fz_id node_id, int max_depth, fz_id* out_buf, int64_t max_len) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(!valid_id(node_id)) return -1;
+
+    // Breadth-first: the result is ordered by distance from node_id
+    std::vector<fz_id> order;
+    std::unordered_set<fz_id> seen; // Children lists may repeat an ID
+    order.push_back(node_id);
+    size_t level_start = 0;
+    for(int level = 0; max_depth < 0 || level < max_depth; ++level) {
+        size_t level_end = order.size();
+        if(level_start == level_end) break;
+        for(size_t i = level_start; i < level_end; ++i) {
+            // Follow parent links like build_index: arbitrary add_child links
+            // (back edges, shared children) must not revisit nodes
+            for(fz_id child_id : nodes[order[i]].children) {
+                if(!valid_id(child_id) || nodes[child_id].parent != order[i]) continue;
+                if(seen.insert(child_id).second) order.push_back(child_id);
+            }
+        }
+        level_start = level_end;
+    }
+
+    int64_t count = order.size();
+    if(out_buf && max_len > 0) {
+        int64_t copy_len = (count < max_len) ? count : max_len;
+        std::copy(order.begin(), order.begin() + copy_len, out_buf);
+    }
+    return count;
+}
+
+// --- Robust Matching (Beam Search) ---
+
+int FluidTree::traverse_beam(fz_id start_node, const int* moves, int n_moves, int tolerance, int n_dirs,
+                             int beam_width, double cond_weight, fz_id* out_nodes, double* out_scores, int max_len) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(!valid_id(start_node)) return -1;
+    if(beam_width < 1) beam_width = 1;
+
+    typedef std::pair<double, fz_id> Hyp; // (score, node)
+    auto better = [](const Hyp& a, const Hyp& b) { return a.first > b.first; };
+
+    std::vector<Hyp> beam = {{0.0, start_node}};
+    std::vector<Hyp> next;
+    for(int step = 0; step < n_moves && !beam.empty(); ++step) {
+        int m = moves[step];
+        next.clear();
+        for(const Hyp& h : beam) {
+            for(fz_id child_id : nodes[h.second].children) {
+                const Node& c = nodes[child_id];
+                if(c.action < 0) continue;
+                // Circular distance for directions (e.g. 7 and 0 are neighbors)
+                int dist = std::abs(c.action - m);
+                if(n_dirs > 0) {
+                    dist = ((c.action - m) % n_dirs + n_dirs) % n_dirs; // Wraps any input into [0, n_dirs)
+                    dist = std::min(dist, n_dirs - dist);
+                }
+                if(dist > tolerance) continue;
+                next.push_back({h.first + cond_weight * eff_conductivity(c) - dist, child_id});
+            }
+        }
+        // Keep only the best beam_width hypotheses (unordered, O(n))
+        if((int)next.size() > beam_width) {
+            std::nth_element(next.begin(), next.begin() + beam_width, next.end(), better);
+            next.resize(beam_width);
+        }
+        beam.swap(next);
+    }
+
+    std::sort(beam.begin(), beam.end(), better);
+    int count = beam.size();
+    if(out_nodes && max_len > 0) {
         int copy_len = (count < max_len) ? count : max_len;
         for(int i=0; i<copy_len; ++i) {
-            out_buf[i] = n.children[i];
+            out_nodes[i] = beam[i].second;
+            if(out_scores) out_scores[i] = beam[i].first;
         }
     }
     return count;
 }
 
+bool FluidTree::is_ancestor_unlocked(fz_id a, fz_id b) const {
+    if(index_valid) {
+        return euler_in[a] <= euler_in[b] && euler_out[b] <= euler_out[a];
+    }
+    // No index: climb from b to a's depth
+    while(b != -1 && nodes[b].depth > nodes[a].depth) b = nodes[b].parent;
+    return b == a;
+}
+
+bool FluidTree::is_ancestor(fz_id a, fz_id b) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(!valid_id(a) || !valid_id(b)) return false;
+    return is_ancestor_unlocked(a, b);
+}
+
+fz_id FluidTree::lca(fz_id a, fz_id b) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(!valid_id(a) || !valid_id(b)) return -1;
+
+    if(is_ancestor_unlocked(a, b)) return a;
+    if(is_ancestor_unlocked(b, a)) return b;
+
+    // Align depths, then climb in lockstep
+    while(nodes[a].depth > nodes[b].depth) a = nodes[a].parent;
+    while(nodes[b].depth > nodes[a].depth) b = nodes[b].parent;
+    while(a != b && a != -1 && b != -1) {
+        a = nodes[a].parent;
+        b = nodes[b].parent;
+    }
+    return (a == b) ? a : -1;
+}
+
+void FluidTree::build_index() {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    int64_t n = nodes.size();
+
+    // CSR adjacency from parent links (children lists may be partial)
+    std::vector<int64_t> offsets(n + 1, 0);
+    for(int64_t i=0; i<n; ++i) {
+        if(valid_id(nodes[i].parent)) offsets[nodes[i].parent + 1]++;
+    }
+    for(int64_t i=0; i<n; ++i) offsets[i + 1] += offsets[i];
+    std::vector<fz_id> adj(offsets[n]);
+    std::vector<int64_t> fill(offsets.begin(), offsets.end() - 1);
+    for(int64_t i=0; i<n; ++i) {
+        if(valid_id(nodes[i].parent)) adj[fill[nodes[i].parent]++] = i;
+    }
+
+    // Iterative DFS from every root
+    euler_in.assign(n, 0);
+    euler_out.assign(n, 0);
+    std::vector<std::pair<fz_id, int64_t>> stack; // (node, next adj offset)
+    int64_t timer = 0;
+    for(fz_id root = 0; root < n; ++root) {
+        if(valid_id(nodes[root].parent)) continue;
+        euler_in[root] = timer++;
+        stack.push_back({root, offsets[root]});
+        while(!stack.empty()) {
+            auto& top = stack.back();
+            if(top.second < offsets[top.first + 1]) {
+                fz_id child = adj[top.second++];
+                euler_in[child] = timer++;
+                stack.push_back({child, offsets[child]});
+            } else {
+                euler_out[top.first] = timer++;
+                stack.pop_back();
+            }
+        }
+    }
+    index_valid = true;
+}
+
+// --- Forgetting (Lazy Decay) ---
+
+double FluidTree::eff_conductivity(const Node& n) const {
+    if(n.decay_mark == m_decay_scale) return n.conductivity;
+    return FZ_PRIOR_CONDUCTIVITY + (n.conductivity - FZ_PRIOR_CONDUCTIVITY) * (m_decay_scale / n.decay_mark);
+}
+
+// Rounded only here: the stored count keeps its fraction across decays
+int64_t FluidTree::eff_visits(const Node& n) const {
+    if(n.decay_mark == m_decay_scale) return std::llround(n.visit_count);
+    return std::llround(n.visit_count * (m_decay_scale / n.decay_mark));
+}
+
+void FluidTree::resolve(Node& n) {
+    if(n.decay_mark == m_decay_scale) return;
+    n.conductivity = eff_conductivity(n);
+    n.visit_count *= m_decay_scale / n.decay_mark;
+    n.decay_mark = m_decay_scale;
+}
+
+void FluidTree::materialize_decay_unlocked() {
+    if(m_decay_scale == 1.0) {
+        bool pending = false;
+        for(int64_t i=0; i<nodes.size() && !pending; ++i) pending = nodes[i].decay_mark != 1.0;
+        if(!pending) return;
+    }
+    for(int64_t i=0; i<nodes.size(); ++i) {
+        Node& n = nodes[i];
+        resolve(n);
+        n.decay_mark = 1.0;
+    }
+    m_decay_scale = 1.0;
+}
+
+void FluidTree::decay(double factor) {
+    if(!(factor > 0.0 && factor <= 1.0)) throw std::runtime_error("Decay factor must be in (0, 1]");
+    std::lock_guard<std::mutex> lock(m_mutex);
+    m_decay_scale *= factor;
+    m_decay_epoch++;
+    // Rescale before the global factor underflows (rare: amortized over many epochs)
+    if(m_decay_scale < 1e-200) materialize_decay_unlocked();
+}
+
+void FluidTree::materialize_decay() {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    materialize_decay_unlocked();
+}
+
+// --- Frozen Snapshots ---
+
+std::shared_ptr<const FluxSnapshot> FluidTree::snapshot() {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    return snapshot_unlocked();
+}
+
+std::shared_ptr<FluxSnapshot> FluidTree::snapshot_unlocked() {
+    auto snap = std::make_shared<FluxSnapshot>();
+    int64_t n = nodes.size();
+
+    snap->m_parent.resize(n);
+    snap->m_visits.resize(n);
+    snap->m_conductivity.resize(n);
+    snap->m_action.resize(n);
+    snap->m_depth.resize(n);
+    snap->m_best_child.resize(n);
+    snap->m_child_offsets.resize(n + 1);
+
+    int64_t total_children = 0;
+    for(int64_t i=0; i<n; ++i) total_children += nodes[i].children.size();
+    snap->m_child_ids.reserve(total_children);
+
+    for(int64_t i=0; i<n; ++i) {
+        const Node& node = nodes[i];
+        snap->m_parent[i] = node.parent;
+        snap->m_visits[i] = eff_visits(node);
+        snap->m_conductivity[i] = eff_conductivity(node);
+        snap->m_action[i] = node.action;
+        snap->m_depth[i] = node.depth;
+        snap->m_child_offsets[i] = snap->m_child_ids.size();
+
+        snap->m_child_ids.insert(snap->m_child_ids.end(), node.children.begin(), node.children.end());
+        snap->m_best_child[i] = best_child_unlocked(nodes[i], false);
+    }
+    snap->m_child_offsets[n] = snap->m_child_ids.size();
+    return snap;
+}
+
+uint64_t FluidTree::publish_snapshot() {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    std::shared_ptr<FluxSnapshot> snap = snapshot_unlocked();
+    snap->m_version = ++m_publish_version;
+    // Stored under the lock: a slower publisher can't overwrite a newer version
+    std::atomic_store(&m_published, std::shared_ptr<const FluxSnapshot>(snap));
+    return snap->m_version;
+}
+
+std::shared_ptr<const FluxSnapshot> FluidTree::current_snapshot() const {
+    return std::atomic_load(&m_published);
+}
+
 // --- Persistence (Saving the FluxGraph) ---
 #include <fstream>
 #include <stdexcept>
 
+// File versions:
+//   "FLUX" v1: 32-bit fields, no actions
+//   "FLX2" v2: 32-bit fields + edge action
+//   "FLX3" v3: 64-bit node count, IDs, visits and child counts + edge action
 void FluidTree::save_to_file(const char* filename) {
     std::lock_guard<std::mutex> lock(m_mutex);
     std::ofstream out(filename, std::ios::binary);
     if(!out) throw std::runtime_error("Failed to open file for writing at " + std::string(filename));
     
     // Header
-    char magic[4] = {'F', 'L', 'U', 'X'};
+    char magic[4] = {'F', 'L', 'X', '3'};
     out.write(magic, 4);
     
-    int count = nodes.size();
-    out.write((char*)&count, sizeof(int));
+    int64_t count = nodes.size();
+    out.write((char*)&count, sizeof(int64_t));
     if(!out) throw std::runtime_error("Write failed");
     
-    for(const auto& n : nodes) {
-        out.write((char*)&n.id, sizeof(int));
-        out.write((char*)&n.visit_count, sizeof(int));
-        out.write((char*)&n.conductivity, sizeof(double));
-        out.write((char*)&n.parent, sizeof(int));
+    for(int64_t i=0; i<count; ++i) {
+        const Node& n = nodes[i];
+        int64_t visits = eff_visits(n);
+        double cond = eff_conductivity(n);
+        out.write((char*)&n.id, sizeof(fz_id));
+        out.write((char*)&visits, sizeof(int64_t));
+        out.write((char*)&cond, sizeof(double));
+        out.write((char*)&n.parent, sizeof(fz_id));
+        out.write((char*)&n.action, sizeof(int));
         
-        int n_children = n.children.size();
-        out.write((char*)&n_children, sizeof(int));
+        int64_t n_children = n.children.size();
+        out.write((char*)&n_children, sizeof(int64_t));
         if(n_children > 0) {
-            out.write((char*)n.children.data(), n_children * sizeof(int));
+            out.write((char*)n.children.data(), n_children * sizeof(fz_id));
         }
     }
     out.close();
 }
 
+// Reads the magic + node count. Returns the format version (1-3), or 0 for foreign files.
+static int read_header(std::istream& in, int64_t& count) {
+    char magic[4];
+    in.read(magic, 4);
+    if(!in || magic[0]!='F' || magic[1]!='L') return 0;
+    int version;
+    if(magic[2]=='U' && magic[3]=='X') version = 1;
+    else if(magic[2]=='X' && magic[3]=='2') version = 2;
+    else if(magic[2]=='X' && magic[3]=='3') version = 3;
+    else return 0;
+    
+    if(version >= 3) {
+        in.read((char*)&count, sizeof(int64_t));
+    } else {
+        int count32 = 0;
+        in.read((char*)&count32, sizeof(int));
+        count = count32;
+    }
+    return (in && count >= 0) ? version : 0;
+}
+
+// Smallest on-disk record (no children) for each format version
+static int64_t min_record_size(int version) {
+    if(version >= 3) return 3 * sizeof(int64_t) + sizeof(double) + sizeof(int) + sizeof(int64_t);
+    return (version >= 2 ? 4 : 3) * sizeof(int) + sizeof(double) + sizeof(int);
+}
+
+static int64_t stream_size(std::istream& in) {
+    std::streampos here = in.tellg();
+    in.seekg(0, std::ios::end);
+    int64_t size = in.tellg();
+    in.seekg(here);
+    return size;
+}
+
+// Reads one node record (depth is left for the caller). Child lists longer
+// than max_bytes could hold put the stream in a failed state.
+static void read_record(std::istream& in, int version, Node& n, int64_t max_bytes) {
+    n.action = -1;
+    n.children.clear();
+    if(version >= 3) {
+        int64_t visits = 0;
+        in.read((char*)&n.id, sizeof(fz_id));
+        in.read((char*)&visits, sizeof(int64_t));
+        in.read((char*)&n.conductivity, sizeof(double));
+        in.read((char*)&n.parent, sizeof(fz_id));
+        in.read((char*)&n.action, sizeof(int));
+        n.visit_count = visits;
+        
+        int64_t n_children = 0;
+        in.read((char*)&n_children, sizeof(int64_t));
+        if(n_children < 0 || n_children > max_bytes / (int64_t)sizeof(fz_id)) in.setstate(std::ios::failbit);
+        if(in && n_children > 0) {
+            n.children.resize(n_children);
+            in.read((char*)n.children.data(), n_children * sizeof(fz_id));
+        }
+        return;
+    }
+    
+    // Legacy 32-bit records
+    int id = 0, visits = 0, parent = -1, n_children = 0;
+    in.read((char*)&id, sizeof(int));
+    in.read((char*)&visits, sizeof(int));
+    in.read((char*)&n.conductivity, sizeof(double));
+    in.read((char*)&parent, sizeof(int));
+    if(version >= 2) in.read((char*)&n.action, sizeof(int));
+    in.read((char*)&n_children, sizeof(int));
+    n.id = id;
+    n.visit_count = visits;
+    n.parent = parent;
+    if(n_children < 0 || n_children > max_bytes / (int64_t)sizeof(int)) in.setstate(std::ios::failbit);
+    if(in && n_children > 0) {
+        std::vector<int> children32(n_children);
+        in.read((char*)children32.data(), n_children * sizeof(int));
+        n.children.assign(children32.begin(), children32.end());
+    }
+}
+
 void FluidTree::load_from_file(const char* filename) {
     std::lock_guard<std::mutex> lock(m_mutex);
     std::ifstream in(filename, std::ios::binary);
     if(!in.is_open()) return;
     
-    char magic[4];
-    in.read(magic, 4);
-    if(magic[0]!='F' || magic[1]!='L' || magic[2]!='U' || magic[3]!='X') return;
+    int64_t file_size = stream_size(in);
+    int64_t count;
+    int version = read_header(in, count);
+    if(!version) return;
+    if(count > (file_size - (int64_t)in.tellg()) / min_record_size(version)) {
+        throw std::runtime_error("Corrupt tree file (node count exceeds file size): " + std::string(filename));
+    }
+    
+    // Records are read into a scratch arena; the live tree is only replaced
+    // once the whole file has been read, so bad files leave it untouched.
+    ChunkedArena<Node> loaded;
+    loaded.reserve(count);
+    for(int64_t i=0; i<count; ++i) {
+        Node n{};
+        read_record(in, version, n, file_size);
+        if(!in) throw std::runtime_error("Truncated tree file: " + std::string(filename));
+        if(n.id != i) throw std::runtime_error("Corrupt tree file (node IDs out of order): " + std::string(filename));
+        n.decay_mark = 1.0; // Files hold resolved values
+        // Parents precede children (create_node order), so depth is one lookup
+        n.depth = (n.parent >= 0 && n.parent < i) ? loaded[n.parent].depth + 1 : 0;
+        loaded.push_back(std::move(n));
+    }
+    in.close();
     
     nodes.clear();
-    int count;
-    in.read((char*)&count, sizeof(int));
+    for(int64_t i=0; i<count; ++i) nodes.push_back(std::move(loaded[i]));
+    index_valid = false;
+    m_decay_scale = 1.0;
+    rebuild_best_index();
+}
+
+int64_t FluidTree::node_count() {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    return nodes.size();
+}
+
+int64_t FluidTree::peek_file_count(const char* filename) {
+    std::ifstream in(filename, std::ios::binary);
+    int64_t count;
+    if(!in.is_open() || !read_header(in, count)) return -1;
+    return count;
+}
+
+int64_t FluidTree::export_range(fz_id start, FZ_NodeRecord* out, int64_t max_len) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    if(start < 0 || !out) return 0;
+    int64_t end = start + max_len;
+    if(end > nodes.size()) end = nodes.size();
+    for(fz_id i = start; i < end; ++i) {
+        const Node& n = nodes[i];
+        out[i - start] = {n.id, n.parent, eff_visits(n), eff_conductivity(n), n.action};
+    }
+    return (end > start) ? end - start : 0;
+}
+
+void FluidTree::reserve(int64_t n) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    nodes.reserve(n);
+}
+
+int64_t FluidTree::capacity() {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    return nodes.capacity();
+}
+
+// --- Shard Merging ---
+
+FluidTree::MergeState FluidTree::begin_merge(int strategy, const fz_id* root_pairs, int64_t n_pairs, int64_t other_count) const {
+    if(strategy < FZ_MERGE_VISIT_WEIGHTED || strategy > FZ_MERGE_MEAN) throw std::runtime_error("Unknown merge strategy");
     
-    for(int i=0; i<count; ++i) {
-        Node n;
-        in.read((char*)&n.id, sizeof(int));
-        in.read((char*)&n.visit_count, sizeof(int));
-        in.read((char*)&n.conductivity, sizeof(double));
-        in.read((char*)&n.parent, sizeof(int));
-        
-        int n_children;
-        in.read((char*)&n_children, sizeof(int));
-        if(n_children > 0) {
-            n.children.resize(n_children);
-            in.read((char*)n.children.data(), n_children * sizeof(int));
+    MergeState st;
+    st.strategy = strategy;
+    for(int64_t i=0; i<n_pairs; ++i) {
+        fz_id self_id = root_pairs[2*i + 1];
+        if(valid_id(self_id) && nodes[self_id].parent < 0) st.root_hints[root_pairs[2*i]] = self_id;
+    }
+    st.id_map.assign(other_count, -1);
+    st.linked.assign(other_count, false);
+    return st;
+}
+
+// Rejects shard records that merge_record could not place. Runs over the whole
+// shard before anything is merged, so a bad shard leaves the tree untouched.
+static void check_shard_record(const Node& rec, int64_t count) {
+    if(rec.id < 0 || rec.id >= count) throw std::runtime_error("Shard node ID out of range");
+    if(rec.parent >= 0 && rec.action < 0) {
+        // Children are matched by edge action; unlabeled ones would be duplicated
+        throw std::runtime_error("Shard node " + std::to_string(rec.id) +
+                                 " has no edge action (create children with create_node(parent, action=...))");
+    }
+}
+
+void FluidTree::merge_record(MergeState& st, const Node& rec) {
+    fz_id oid = rec.id;
+    
+    // 1. Find the matching node (parents are always merged before children)
+    fz_id target = -1;
+    bool fresh = false;
+    bool has_parent = rec.parent >= 0 && rec.parent < oid && st.id_map[rec.parent] != -1;
+    if(!has_parent) {
+        if(oid == 0) {
+            target = 0;
+        } else {
+            auto hint = st.root_hints.find(oid);
+            if(hint != st.root_hints.end()) target = hint->second;
+        }
+        if(target == -1) {
+            target = create_node_unlocked(-1, rec.action);
+            fresh = true;
+        }
+    } else {
+        fz_id mp = st.id_map[rec.parent];
+        if(rec.action >= 0) {
+            for(fz_id cid : nodes[mp].children) {
+                if(nodes[cid].parent == mp && nodes[cid].action == rec.action) { target = cid; break; }
+            }
+        }
+        if(target == -1) {
+            target = create_node_unlocked(mp, rec.action);
+            if(st.linked[oid]) nodes[mp].children.push_back(target);
+            fresh = true;
         }
-        nodes.push_back(n);
     }
-    in.close();
+    st.id_map[oid] = target;
+    
+    // 2. Remember which of this record's children were linked (they come later)
+    for(fz_id cid : rec.children) {
+        if(cid > oid && cid < (int64_t)st.linked.size()) st.linked[cid] = true;
+    }
+    
+    // 3. Combine statistics
+    Node& n = nodes[target];
+    resolve(n);
+    if(fresh) {
+        n.visit_count = rec.visit_count;
+        n.conductivity = rec.conductivity;
+        return;
+    }
+    double v1 = n.visit_count, v2 = rec.visit_count;
+    double c1 = n.conductivity, c2 = rec.conductivity;
+    switch(st.strategy) {
+        case FZ_MERGE_VISIT_WEIGHTED:
+            n.conductivity = (v1 + v2 > 0) ? (c1 * v1 + c2 * v2) / (v1 + v2) : 0.5 * (c1 + c2);
+            break;
+        case FZ_MERGE_MAX_VISITS:
+            n.conductivity = (v2 > v1) ? c2 : c1;
+            break;
+        case FZ_MERGE_MEAN:
+            n.conductivity = 0.5 * (c1 + c2);
+            break;
+    }
+    n.visit_count = v1 + v2;
+}
+
+void FluidTree::merge_from(FluidTree& other, int strategy, const fz_id* root_pairs, int64_t n_pairs,
+                           fz_id* id_map, int64_t max_len) {
+    if(&other == this) throw std::runtime_error("Cannot merge a tree into itself");
+    std::scoped_lock lock(m_mutex, other.m_mutex);
+    
+    other.materialize_decay_unlocked(); // Records are read raw below
+    for(int64_t i=0; i<other.nodes.size(); ++i) check_shard_record(other.nodes[i], other.nodes.size());
+    MergeState st = begin_merge(strategy, root_pairs, n_pairs, other.nodes.size());
+    for(int64_t i=0; i<other.nodes.size(); ++i) merge_record(st, other.nodes[i]);
+    index_valid = false;
+    rebuild_best_index();
+    
+    if(id_map && max_len > 0) {
+        int64_t copy_len = ((int64_t)st.id_map.size() < max_len) ? st.id_map.size() : max_len;
+        std::copy(st.id_map.begin(), st.id_map.begin() + copy_len, id_map);
+    }
+}
+
+int64_t FluidTree::merge_file(const char* filename, int strategy, const fz_id* root_pairs, int64_t n_pairs,
+                              fz_id* id_map, int64_t max_len) {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    std::ifstream in(filename, std::ios::binary);
+    if(!in.is_open()) return -1;
+    
+    int64_t file_size = stream_size(in);
+    int64_t count;
+    int version = read_header(in, count);
+    if(!version) return -1;
+    if(count > (file_size - (int64_t)in.tellg()) / min_record_size(version)) {
+        throw std::runtime_error("Corrupt shard (node count exceeds file size): " + std::string(filename));
+    }
+    
+    // Only one shard record is held at a time. A first pass validates the
+    // whole shard, so truncated or unmergeable files leave the tree untouched.
+    MergeState st = begin_merge(strategy, root_pairs, n_pairs, count);
+    std::streampos records_start = in.tellg();
+    Node rec;
+    for(int64_t i=0; i<count; ++i) {
+        read_record(in, version, rec, file_size);
+        if(!in) throw std::runtime_error("Truncated shard: " + std::string(filename));
+        check_shard_record(rec, count);
+    }
+    in.clear();
+    in.seekg(records_start);
+    for(int64_t i=0; i<count; ++i) {
+        read_record(in, version, rec, file_size);
+        merge_record(st, rec);
+    }
+    index_valid = false;
+    rebuild_best_index();
+    
+    if(id_map && max_len > 0) {
+        int64_t copy_len = (count < max_len) ? count : max_len;
+        std::copy(st.id_map.begin(), st.id_map.begin() + copy_len, id_map);
+    }
+    return count;
 }
@@ -4,18 +4,52 @@
 #include <vector>
 #include <map>
 #include <mutex>
+#include <unordered_map>
+#include <cstdint>
+#include <memory>
+#include <atomic>
+#include "fz_env.hpp"
+#include "fz_arena.hpp"
+#include "fz_snapshot.hpp"
 
 extern "C" {
     void fz_calc_flow_probs(int n, const double* conds, double expl, double* probs);
     void fz_update_conductivity(double old, double reward, double lr, double* new_val);
 }
 
+// Node IDs and visit counters are 64-bit so trees can grow past 2^31 nodes
+// (fz_id is declared in fz_snapshot.hpp). Visits are stored as doubles (exact
+// up to 2^53) so decay keeps their fractions; every read rounds them.
+
+// Conductivity of an untrained pipe; decay fades learned values back toward it
+constexpr double FZ_PRIOR_CONDUCTIVITY = 0.5;
+
 struct Node {
-    int id;
-    int visit_count;
+    fz_id id;
+    double visit_count;
     double conductivity; // Win Rate / Quality
-    std::vector<int> children; // IDs of children
-    int parent;
+    std::vector<fz_id> children; // IDs of children
+    fz_id parent;
+    int depth; // Distance to root (cached at creation)
+    int action; // Edge label from parent (move / direction), -1 = unlabeled
+    double decay_mark; // Global decay scale when visits/conductivity were last resolved
+
+    // Best-child index, maintained incrementally by backpropagate/add_child.
+    // Ties go to the child listed first, exactly as a scan of 'children' would.
+    // The argmax by conductivity lives in FluidTree (only kept when enabled).
+    // Bit-fields have no initializers: brace-initialization zeroes them.
+    fz_id best_visits = -1;       // Argmax child by visits
+    int32_t slot = -1;            // Position in its parent's children (-1 = not listed; not indexed)
+    uint32_t best_epoch : 30;     // Decay epoch (low bits) the index was built in (rounding may tie siblings)
+    uint32_t best_cond_stale : 1; // Conductivity argmax dropped: rescan on next query
+    uint32_t best_scan : 1;       // Children include nodes parented elsewhere: always scan
+};
+
+// Merge strategies for conductivity (visits are always summed)
+enum FZ_MergeStrategy {
+    FZ_MERGE_VISIT_WEIGHTED = 0, // (c1*v1 + c2*v2) / (v1 + v2)
+    FZ_MERGE_MAX_VISITS = 1,     // Conductivity of the more visited side
+    FZ_MERGE_MEAN = 2            // Plain average
 };
 
 class FluidTree {
@@ -24,30 +58,153 @@ public:
     ~FluidTree();
 
     // Tree Management
-    int create_node(int parent_id); // Returns new ID
-    void add_child(int parent_id, int child_id);
+    fz_id create_node(fz_id parent_id); // Returns new ID
+    void add_child(fz_id parent_id, fz_id child_id);
+    void set_action(fz_id node_id, int action);
+    int get_action(fz_id node_id);
     
     // Core FTS (Fluid Tree Search) Logic
     // Selects a path from start_node to a leaf based on Fluid Dynamics
     // Returns the ID of the leaf node selected
-    int select_leaf(int start_node, double exploration);
+    fz_id select_leaf(fz_id start_node, double exploration);
     
     // Learning
-    void backpropagate(int leaf_node, double reward, double learning_rate);
+    void backpropagate(fz_id leaf_node, double reward, double learning_rate);
+
+    // In-Engine Search
+    // Runs n_sims select/expand/rollout/backprop cycles against a native environment.
+    // Children are created lazily with their move stored as the node action.
+    // Rewards are backed up from the search root down (ancestors above it are untouched),
+    // flipped per ply when the environment reports the side to move.
+    // Returns the number of simulations completed.
+    int run_search(fz_id root, const FZ_Env* env, void* root_state, int n_sims,
+                   double exploration, double learning_rate, int n_threads);
     
     // Diagnostics
-    int get_visit_count(int node_id);
-    double get_conductivity(int node_id);
-    int get_best_child(int node_id); // Most visited
-    int get_children(int node_id, int* out_buf, int max_len); // robust access
+    int64_t get_visit_count(fz_id node_id);
+    double get_conductivity(fz_id node_id);
+    fz_id get_best_child(fz_id node_id); // Most visited (O(1), indexed)
+    // Batched lookup under one lock: out[i] = best child of ids[i] (-1 if none/invalid).
+    // by_conductivity picks the most conductive child instead of the most visited.
+    // Conductivity answers scan the children unless the conductivity index is enabled
+    // (one extra ID per node, maintained like the visit index).
+    int64_t best_children(const fz_id* ids, int64_t n, fz_id* out, bool by_conductivity);
+    void set_conductivity_index(bool enabled);
+    int64_t get_children(fz_id node_id, fz_id* out_buf, int64_t max_len); // robust access
+
+    // Ancestry & Subtree Queries (Interpretability)
+    // Buffer functions follow get_children: return the full count, copy up to max_len.
+    int depth(fz_id node_id);
+    int64_t path_to_root(fz_id node_id, fz_id* out_buf, int64_t max_len); // node_id first, root last
+    int64_t subtree_ids(fz_id node_id, int max_depth, fz_id* out_buf, int64_t max_len); // BFS order over parent links, max_depth < 0 = unbounded
+    fz_id lca(fz_id a, fz_id b); // Lowest common ancestor, -1 if disjoint
+    bool is_ancestor(fz_id a, fz_id b); // a == b counts as ancestor
+
+    // Robust Matching (Beam Search)
+    // Follows 'moves' by edge action, keeping the beam_width best partial matches.
+    // Each step scores: cond_weight * conductivity(child) - circular distance (over n_dirs).
+    // Writes the surviving leaves (best first) and returns how many there are.
+    int traverse_beam(fz_id start_node, const int* moves, int n_moves, int tolerance, int n_dirs,
+                      int beam_width, double cond_weight, fz_id* out_nodes, double* out_scores, int max_len);
+
+    // Forgetting (non-stationary workloads)
+    // decay() scales every node's visits and conductivity-above-prior by factor in O(1):
+    // only a global scale changes; nodes resolve the pending factor lazily when touched.
+    // materialize_decay() is the optional full pass that applies it to every node now.
+    void decay(double factor); // 0 < factor <= 1
+    void materialize_decay();
+
+    // Frozen Snapshots (lock-free reads)
+    // snapshot() copies the tree into an immutable FluxSnapshot (version 0).
+    // publish_snapshot() builds one and swaps it in atomically (RCU-style): readers
+    // holding the previous snapshot keep it alive until they release it.
+    // Published versions count up from 1 without gaps.
+    std::shared_ptr<const FluxSnapshot> snapshot();
+    uint64_t publish_snapshot(); // Returns the new version
+    std::shared_ptr<const FluxSnapshot> current_snapshot() const; // May be null
+
+    // Euler-tour index: O(1) ancestor checks. Invalidated by structural changes.
+    void build_index();
     
     // Persistence
     void save_to_file(const char* filename);
     void load_from_file(const char* filename);
+    int64_t node_count();
+    static int64_t peek_file_count(const char* filename); // -1 if not a .flux file
+
+    // Bulk export: fills records for IDs [start, start + max_len), returns how many.
+    // Locks per call, so chunked readers never hold the tree for long.
+    int64_t export_range(fz_id start, FZ_NodeRecord* out, int64_t max_len);
+
+    // Capacity: pre-allocates arena chunks so n nodes fit without further allocation
+    void reserve(int64_t n);
+    int64_t capacity();
+
+    // Shard Merging
+    // Nodes are matched by (matched parent, edge action); unmatched nodes are appended.
+    // Node 0 always matches node 0. Other roots match via root_pairs
+    // (flat [other_id, self_id, ...] list, e.g. from shared state keys), else are appended.
+    // id_map (optional) receives other ID -> merged ID for the first max_len IDs.
+    // Throws (leaving this tree unchanged) if the shard has non-root nodes without an action.
+    void merge_from(FluidTree& other, int strategy, const fz_id* root_pairs, int64_t n_pairs,
+                    fz_id* id_map, int64_t max_len);
+    // Streaming variant: reads the shard record by record (bounded extra memory),
+    // in two passes: validate everything, then merge.
+    // Returns the shard's node count, or -1 if it could not be read.
+    int64_t merge_file(const char* filename, int strategy, const fz_id* root_pairs, int64_t n_pairs,
+                       fz_id* id_map, int64_t max_len);
 
 private:
-    std::vector<Node> nodes;
-    std::mutex m_mutex;
+    ChunkedArena<Node> nodes; // Stable addresses: growth never relocates nodes
+    mutable std::mutex m_mutex;
+
+    // Latest published snapshot (accessed with std::atomic_load/atomic_store;
+    // stores happen under m_mutex so versions never go backwards)
+    std::shared_ptr<const FluxSnapshot> m_published;
+    uint64_t m_publish_version = 0;
+    std::shared_ptr<FluxSnapshot> snapshot_unlocked();
+
+    // Euler-tour index (parent links). Rebuilt on demand via build_index().
+    std::vector<int64_t> euler_in;
+    std::vector<int64_t> euler_out;
+    bool index_valid = false;
+
+    // Lazy decay: a node's stored stats are exact as of its decay_mark, so the
+    // pending factor is m_decay_scale / decay_mark. Reads go through eff_*,
+    // writes call resolve() first.
+    double m_decay_scale = 1.0;
+    uint64_t m_decay_epoch = 0; // Bumped by decay(): best-child indexes are rechecked lazily
+    // Node::best_epoch holds the low bits (a node would have to sit unqueried for 2^30 decays to alias)
+    uint32_t epoch_tag() const { return (uint32_t)(m_decay_epoch & ((1u << 30) - 1)); }
+    double eff_conductivity(const Node& n) const;
+    int64_t eff_visits(const Node& n) const;
+    void resolve(Node& n);
+    void materialize_decay_unlocked(); // Resolves every node and resets the scale to 1
+
+    // Best-child index helpers
+    std::unique_ptr<ChunkedArena<fz_id>> m_best_cond; // Argmax child by conductivity per node (null = scan)
+    void offer_child(Node& parent, fz_id child_id, double old_cond);
+    void link_child(Node& parent, fz_id child_id); // Records slot + offers a newly listed child
+    fz_id best_child_unlocked(Node& n, bool by_conductivity);
+    fz_id scan_best_child(const Node& n, bool by_conductivity) const;
+    void rebuild_best_index(); // After bulk changes (load, merge)
+
+    bool valid_id(fz_id node_id) const { return node_id >= 0 && node_id < nodes.size(); }
+    fz_id create_node_unlocked(fz_id parent_id, int action);
+    fz_id pick_child(const Node& n, double exploration, double r) const; // Flow-weighted sample
+    void erode(fz_id node_id, double reward, double learning_rate); // One backprop step (locked by caller)
+    void search_worker(fz_id root, const FZ_Env* env, void* root_state, int n_sims,
+                       double exploration, double learning_rate, unsigned seed, int* done);
+    bool is_ancestor_unlocked(fz_id a, fz_id b) const;
+
+    struct MergeState {
+        int strategy;
+        std::unordered_map<fz_id, fz_id> root_hints;
+        std::vector<fz_id> id_map; // Shard ID -> merged ID
+        std::vector<bool> linked;  // Shard ID appears in its parent's children list
+    };
+    MergeState begin_merge(int strategy, const fz_id* root_pairs, int64_t n_pairs, int64_t other_count) const;
+    void merge_record(MergeState& st, const Node& rec);
 };
 
 #endif
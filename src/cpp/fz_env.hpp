@@ -0,0 +1,26 @@
+#ifndef FZ_ENV_HPP
+#define FZ_ENV_HPP
+
+// Environment Plugin ABI
+// A game/simulator is described by plain C function pointers so it can come
+// from a shared library or from ctypes callbacks. States are opaque handles.
+// terminal_value reports values for the side to move at the search root; with
+// to_move set, the search treats the game as two-player zero-sum and credits
+// each move with the value for the player who made it (1 - value for the opponent).
+extern "C" {
+    typedef struct FZ_Env {
+        void* (*clone)(void* state, void* user);          // Deep copy of a state
+        void  (*release)(void* state, void* user);        // Frees a cloned state
+        int   (*legal_moves)(void* state, int* out_moves, int max_len, void* user); // Returns count
+        void  (*step)(void* state, int move, void* user); // Applies a move in place
+        int   (*terminal_value)(void* state, double* value, void* user); // 1 if terminal (value in [0, 1])
+        int   (*to_move)(void* state, void* user);        // Side to move (player index); NULL = single agent
+        void* user;                                       // Passed back to every call
+    } FZ_Env;
+
+    // Reference Connect-4 (bitboard) environment
+    const FZ_Env* fz_connect4_env();
+    void* fz_connect4_new(const int* moves, int n_moves);
+}
+
+#endif
@@ -0,0 +1,49 @@
+#include "fz_export.hpp"
+#include <cstdio>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+int64_t fz_export_stream(const char* filename, int format, const FZ_RecordFetch& fetch, int64_t chunk_size) {
+    if(format < FZ_EXPORT_CSV || format > FZ_EXPORT_DOT) throw std::runtime_error("Unknown export format");
+    if(chunk_size <= 0) throw std::runtime_error("chunk_size must be positive");
+
+    FILE* out = std::fopen(filename, "w");
+    if(!out) throw std::runtime_error("Failed to open file for writing at " + std::string(filename));
+
+    if(format == FZ_EXPORT_CSV) std::fputs("id,parent,visits,conductivity,action\n", out);
+    if(format == FZ_EXPORT_DOT) std::fputs("digraph FluxZero {\n", out);
+
+    std::vector<FZ_NodeRecord> chunk(chunk_size);
+    int64_t total = 0;
+    while(true) {
+        int64_t n = fetch(total, chunk.data(), chunk_size);
+        if(n <= 0) break;
+        for(int64_t i=0; i<n; ++i) {
+            const FZ_NodeRecord& r = chunk[i];
+            long long id = r.id, parent = r.parent, visits = r.visits;
+            switch(format) {
+                case FZ_EXPORT_CSV:
+                    std::fprintf(out, "%lld,%lld,%lld,%.9g,%d\n", id, parent, visits, r.conductivity, r.action);
+                    break;
+                case FZ_EXPORT_JSONL:
+                    std::fprintf(out, "{\"id\": %lld, \"parent\": %lld, \"visits\": %lld, \"conductivity\": %.9g, \"action\": %d}\n",
+                                 id, parent, visits, r.conductivity, r.action);
+                    break;
+                case FZ_EXPORT_DOT:
+                    std::fprintf(out, "  n%lld [label=\"%lld\\nv=%lld c=%.3f\"];\n", id, id, visits, r.conductivity);
+                    if(parent >= 0) {
+                        if(r.action >= 0) std::fprintf(out, "  n%lld -> n%lld [label=\"%d\"];\n", parent, id, r.action);
+                        else std::fprintf(out, "  n%lld -> n%lld;\n", parent, id);
+                    }
+                    break;
+            }
+        }
+        total += n;
+    }
+
+    if(format == FZ_EXPORT_DOT) std::fputs("}\n", out);
+    bool failed = std::ferror(out) != 0;
+    if(std::fclose(out) != 0 || failed) throw std::runtime_error("Write failed");
+    return total;
+}
@@ -0,0 +1,24 @@
+#ifndef FZ_EXPORT_HPP
+#define FZ_EXPORT_HPP
+
+#include <cstdint>
+#include <functional>
+#include "fz_snapshot.hpp"
+
+// Streaming Export
+// Pulls fixed-size chunks of node records and writes them out as it goes, so
+// memory stays at one chunk no matter how large the tree is.
+enum FZ_ExportFormat {
+    FZ_EXPORT_CSV = 0,   // id,parent,visits,conductivity,action
+    FZ_EXPORT_JSONL = 1, // One JSON object per node
+    FZ_EXPORT_DOT = 2    // Graphviz digraph (edges follow parent links)
+};
+
+// fetch(start, out, max_len) -> records written (0 = done)
+typedef std::function<int64_t(int64_t, FZ_NodeRecord*, int64_t)> FZ_RecordFetch;
+
+// Returns the number of nodes written. Throws on I/O errors, unknown formats
+// and non-positive chunk sizes.
+int64_t fz_export_stream(const char* filename, int format, const FZ_RecordFetch& fetch, int64_t chunk_size);
+
+#endif
@@ -0,0 +1,59 @@
+#include "fz_snapshot.hpp"
+
+int64_t FluxSnapshot::get_visit_count(fz_id node_id) const {
+    return valid_id(node_id) ? m_visits[node_id] : 0;
+}
+
+double FluxSnapshot::get_conductivity(fz_id node_id) const {
+    return valid_id(node_id) ? m_conductivity[node_id] : 0.0;
+}
+
+int FluxSnapshot::get_action(fz_id node_id) const {
+    return valid_id(node_id) ? m_action[node_id] : -1;
+}
+
+fz_id FluxSnapshot::get_parent(fz_id node_id) const {
+    return valid_id(node_id) ? m_parent[node_id] : -1;
+}
+
+int FluxSnapshot::depth(fz_id node_id) const {
+    return valid_id(node_id) ? m_depth[node_id] : -1;
+}
+
+fz_id FluxSnapshot::get_best_child(fz_id node_id) const {
+    return valid_id(node_id) ? m_best_child[node_id] : -1;
+}
+
+int64_t FluxSnapshot::get_children(fz_id node_id, fz_id* out_buf, int64_t max_len) const {
+    if(!valid_id(node_id)) return -1;
+    int64_t begin = m_child_offsets[node_id];
+    int64_t count = m_child_offsets[node_id + 1] - begin;
+    if(out_buf && max_len > 0) {
+        int64_t copy_len = (count < max_len) ? count : max_len;
+        for(int64_t i=0; i<copy_len; ++i) out_buf[i] = m_child_ids[begin + i];
+    }
+    return count;
+}
+
+int64_t FluxSnapshot::path_to_root(fz_id node_id, fz_id* out_buf, int64_t max_len) const {
+    if(!valid_id(node_id)) return -1;
+    int64_t count = m_depth[node_id] + 1;
+    if(out_buf && max_len > 0) {
+        fz_id curr = node_id;
+        for(int64_t i=0; i<count && i<max_len && curr != -1; ++i) {
+            out_buf[i] = curr;
+            curr = m_parent[curr];
+        }
+    }
+    return count;
+}
+
+int64_t FluxSnapshot::export_range(fz_id start, FZ_NodeRecord* out, int64_t max_len) const {
+    if(start < 0 || !out) return 0;
+    int64_t end = start + max_len;
+    if(end > size()) end = size();
+    for(fz_id i = start; i < end; ++i) {
+        out[i - start] = {i, m_parent[i], m_visits[i], m_conductivity[i], m_action[i]};
+    }
+    return (end > start) ? end - start : 0;
+}
@@ -0,0 +1,58 @@
+#ifndef FZ_SNAPSHOT_HPP
+#define FZ_SNAPSHOT_HPP
+
+#include <vector>
+#include <cstdint>
+
+typedef int64_t fz_id;
+
+// Flat per-node record for bulk export (mirrored by a NumPy dtype / ctypes Structure).
+// Naturally aligned: 4 x 8 bytes + action + 4 bytes padding = 40 bytes.
+struct FZ_NodeRecord {
+    fz_id id;
+    fz_id parent;
+    int64_t visits;
+    double conductivity;
+    int32_t action;
+};
+
+// Frozen Snapshot
+// Immutable, compact (struct-of-arrays + CSR children) copy of a FluidTree.
+// Nothing mutates it after construction, so any number of threads can query
+// it without locking. Built by FluidTree::snapshot() / publish_snapshot().
+class FluxSnapshot {
+public:
+    int64_t size() const { return (int64_t)m_parent.size(); }
+    uint64_t version() const { return m_version; } // 0 if never published
+
+    int64_t get_visit_count(fz_id node_id) const;
+    double get_conductivity(fz_id node_id) const;
+    int get_action(fz_id node_id) const;
+    fz_id get_parent(fz_id node_id) const;
+    int depth(fz_id node_id) const;
+    fz_id get_best_child(fz_id node_id) const; // Most visited (precomputed)
+
+    // Buffer queries follow FluidTree: return the full count, copy up to max_len
+    int64_t get_children(fz_id node_id, fz_id* out_buf, int64_t max_len) const;
+    int64_t path_to_root(fz_id node_id, fz_id* out_buf, int64_t max_len) const;
+
+    // Bulk export: fills records for IDs [start, start + max_len), returns how many
+    int64_t export_range(fz_id start, FZ_NodeRecord* out, int64_t max_len) const;
+
+private:
+    friend class FluidTree;
+
+    bool valid_id(fz_id node_id) const { return node_id >= 0 && node_id < size(); }
+
+    std::vector<fz_id> m_parent;
+    std::vector<int64_t> m_visits;
+    std::vector<double> m_conductivity;
+    std::vector<int> m_action;
+    std::vector<int> m_depth;
+    std::vector<int64_t> m_child_offsets; // size() + 1 entries
+    std::vector<fz_id> m_child_ids;
+    std::vector<fz_id> m_best_child;
+    uint64_t m_version = 0;
+};
+
+#endif
@@ -0,0 +1,42 @@
+import sys
+import os
+import re
+import subprocess
+import statistics
+
+# --- Benchmark: cold-start cost of 'import fluxzero' (one fresh interpreter per run) ---
+RUNS = 15
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BUDGET_MS = 5.0 # Wall time of the import alone, excluding interpreter startup
+
+def import_time_us(statement):
+    """Cumulative -X importtime of the fluxzero package for one fresh process."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s*\d+\s*\|\s*(\d+)\s*\|\s*fluxzero$", line)
+        if m: return int(m.group(1))
+    raise RuntimeError("fluxzero did not appear in -X importtime output")
+
+def wall_ms(statement):
+    t = []
+    for _ in range(RUNS):
+        proc = subprocess.run([sys.executable, "-c",
+                               "import time; t0 = time.perf_counter()\n" + statement +
+                               "\nprint((time.perf_counter() - t0) * 1000)"],
+                              cwd=ROOT, capture_output=True, text=True, check=True)
+        t.append(float(proc.stdout.split()[-1]))
+    return statistics.median(t)
+
+if __name__ == "__main__":
+    print(f"--- FluxZero Import Benchmark (median of {RUNS} fresh processes) ---")
+    if sys.flags.dont_write_bytecode:
+        print("[WARN] PYTHONDONTWRITEBYTECODE is set: timings include compiling the package every run")
+    import_time_us("import fluxzero") # Warm the bytecode cache
+    imp = statistics.median(import_time_us("import fluxzero") / 1000 for _ in range(RUNS))
+    wall = wall_ms("import fluxzero")
+    print(f"import fluxzero (-X importtime):      {imp:7.2f} ms")
+    print(f"import fluxzero (wall):               {wall:7.2f} ms")
+    print(f"import + first FluidTree() (binds):   {wall_ms('import fluxzero; fluxzero.FluidTree()'):7.2f} ms")
+    print(f"Budget: {BUDGET_MS:.1f} ms -> {'OK' if wall <= BUDGET_MS else 'OVER'}")
+    sys.exit(0 if wall <= BUDGET_MS else 1)
@@ -0,0 +1,30 @@
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fluxzero import FluidTree, connect4_env
+from play_flux_chess import Connect4, FluxAgent
+
+# --- Benchmark: Python rollouts (FluxAgent) vs In-Engine Search ---
+SIMS = 2000
+
+def bench_python():
+    agent = FluxAgent()
+    t0 = time.perf_counter()
+    agent.get_action(Connect4(), simulations=SIMS)
+    return time.perf_counter() - t0
+
+def bench_native(n_threads):
+    tree = FluidTree()
+    env = connect4_env()
+    t0 = time.perf_counter()
+    tree.run_search(0, env, SIMS, n_threads=n_threads)
+    return time.perf_counter() - t0
+
+if __name__ == "__main__":
+    print(f"--- Connect 4 Search Benchmark ({SIMS} simulations, empty board) ---")
+    t_py = bench_python()
+    print(f"Python (FluxAgent.get_action): {t_py*1000:9.1f} ms  ({SIMS/t_py:10.0f} sims/s)")
+    for n_threads in (1, 2, 4):
+        t = bench_native(n_threads)
+        print(f"Native run_search (threads={n_threads}): {t*1000:9.1f} ms  ({SIMS/t:10.0f} sims/s, {t_py/t:6.1f}x)")
@@ -71,7 +71,7 @@ class FluxAgent:
         moves = game_state.get_valid_moves()
         children = []
         for m in moves:
-            cid = self.tree.create_node(node_id)
+            cid = self.tree.create_node(node_id, action=m) # Labeled edges let shards merge
             self.tree.add_child(node_id, cid)
             children.append((m, cid))
             
@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fluxzero import FluidTree
+
+def test_ancestry():
+    print("--- Testing FluxZero Ancestry Queries ---")
+    tree = FluidTree()
+    
+    # Build:      0
+    #           /   \
+    #          a     b
+    #         / \     \
+    #        c   d     e
+    a = tree.create_node(0); tree.add_child(0, a)
+    b = tree.create_node(0); tree.add_child(0, b)
+    c = tree.create_node(a); tree.add_child(a, c)
+    d = tree.create_node(a); tree.add_child(a, d)
+    e = tree.create_node(b); tree.add_child(b, e)
+    
+    # 1. Depth & Path
+    assert tree.depth(0) == 0 and tree.depth(c) == 2
+    path = tree.path_to_root(c)
+    print(f"Path to root from {c}: {path}")
+    assert path == [c, a, 0]
+    print("[PASS] path_to_root traced the decision back to the root.")
+    
+    # 2. Subtree (BFS order, depth limited)
+    assert tree.subtree_ids(a) == [a, c, d]
+    assert tree.subtree_ids(0, max_depth=1) == [0, a, b]
+    assert set(tree.subtree_ids(0)) == {0, a, b, c, d, e}
+    
+    # Links that are not parent links (back edges, repeats) are not followed
+    tree.add_child(c, 0)
+    tree.add_child(a, c)
+    tree.add_child(b, d)
+    assert tree.subtree_ids(0, max_depth=5) == [0, a, b, c, d, e]
+    assert tree.subtree_ids(0) == [0, a, b, c, d, e]
+    print("[PASS] subtree_ids returned the expected nodes.")
+    
+    # 3. LCA / Ancestors, with and without the Euler index
+    for indexed in (False, True):
+        if indexed: tree.build_index()
+        assert tree.lca(c, d) == a
+        assert tree.lca(c, e) == 0
+        assert tree.lca(a, d) == a
+        assert tree.is_ancestor(0, e) and not tree.is_ancestor(a, e)
+    print("[PASS] lca/is_ancestor agree with and without index.")
+    
+    # 4. Index is dropped on growth, answers stay correct
+    f = tree.create_node(e); tree.add_child(e, f)
+    assert tree.is_ancestor(b, f) and tree.lca(f, d) == 0
+    
+    # 5. Separate roots share no ancestor
+    other = tree.create_node(-1)
+    assert tree.lca(other, c) == -1
+    assert tree.depth(9999) == -1 and tree.path_to_root(9999) == []
+    print("[PASS] Invalid / disjoint queries handled.")
+
+if __name__ == "__main__":
+    test_ancestry()
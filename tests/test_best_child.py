@@ -0,0 +1,104 @@
+import sys
+import os
+import random
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fluxzero import FluidTree, connect4_env
+
+def first_max(children, key):
+    return max(children, key=key) if children else -1 # max() keeps the first of equal keys
+
+def check_index(tree, nodes):
+    """Indexed answers must equal a scan in list order (ties go to the first child)."""
+    by_visits = tree.best_children(nodes)
+    by_cond = tree.best_children(nodes, by="conductivity")
+    for node, bv, bc in zip(nodes, by_visits, by_cond):
+        children = tree.get_children(node)
+        if not children:
+            assert bv == bc == -1
+            continue
+        assert bv == tree.get_best_child(node) == first_max(children, tree.get_visits)
+        assert bc == first_max(children, tree.get_conductivity)
+
+def test_best_child():
+    print("--- Testing FluxZero Best-Child Index ---")
+    tree = FluidTree()
+    tree.run_search(0, connect4_env(), 400)
+    nodes = tree.subtree_ids(0)
+    check_index(tree, nodes)
+    print("[PASS] Index matches a full scan after search.")
+    
+    # The conductivity index is optional; once on, it must give the same answers
+    tree.index_conductivity()
+    check_index(tree, nodes)
+    tree.run_search(0, connect4_env(), 100)
+    nodes = tree.subtree_ids(0)
+    check_index(tree, nodes)
+    print("[PASS] Conductivity index matches the scan, including new nodes.")
+    
+    # Ties: the later child reaching the max first must not win over an earlier one
+    tie = FluidTree()
+    a = tie.create_node(0, action=0); tie.add_child(0, a)
+    b = tie.create_node(0, action=1); tie.add_child(0, b)
+    tie.backprop(b, 1.0, 0.5)
+    tie.backprop(a, 1.0, 0.5)
+    assert tie.get_best_child(0) == a == tie.snapshot().get_best_child(0)
+    assert tie.best_children([0], by="conductivity") == [a]
+    tie.index_conductivity()
+    assert tie.best_children([0], by="conductivity") == [a]
+    
+    # Decay rounding can tie siblings (3 and 4 visits -> 2 and 2)
+    tie.backprop(a, 1.0, 0.5); tie.backprop(a, 1.0, 0.5)
+    for _ in range(3): tie.backprop(b, 1.0, 0.5)
+    assert tie.get_best_child(0) == b
+    tie.decay(0.5)
+    assert tie.get_visits(a) == tie.get_visits(b) == 2
+    assert tie.get_best_child(0) == a
+    print("[PASS] Ties go to the first-listed child everywhere.")
+    
+    # 1. Rewards that lower the best conductivity force a lazy rescan
+    rng = random.Random(7)
+    leaves = [n for n in nodes if not tree.get_children(n)]
+    for _ in range(300):
+        tree.backprop(rng.choice(leaves), rng.choice([0.0, 1.0]), 0.3)
+    check_index(tree, nodes)
+    tree.decay(0.5)
+    check_index(tree, nodes)
+    tree.index_conductivity(False)
+    check_index(tree, nodes)
+    tree.index_conductivity(True)
+    print("[PASS] Index tracks backprop (both directions) and decay.")
+    
+    # 2. Links through another parent fall back to scanning
+    a = tree.create_node(-1)
+    b = tree.create_node(-1)
+    tree.add_child(a, b)
+    tree.backprop(b, 1.0, 0.5)
+    other = tree.create_node(a)
+    tree.add_child(a, other)
+    assert tree.get_best_child(a) == b
+    print("[PASS] Foreign children are scanned.")
+    
+    # 3. Load rebuilds the index
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "best.flux")
+        tree.save(path)
+        loaded = FluidTree()
+        loaded.index_conductivity()
+        loaded.load(path)
+    check_index(loaded, nodes)
+    assert tree.best_children([len(tree) + 5]) == [-1]
+    print("[PASS] Index rebuilt on load.")
+    
+    try:
+        import numpy as np
+    except ImportError:
+        print("[SKIP] NumPy not installed; array input not tested.")
+        return
+    ids = np.array(nodes, dtype=np.int32)
+    out = tree.best_children(ids)
+    assert out.dtype == np.int64 and list(out) == tree.best_children(nodes)
+    print("[PASS] NumPy arrays are looked up in place.")
+
+if __name__ == "__main__":
+    test_best_child()
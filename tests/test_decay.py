@@ -0,0 +1,95 @@
+import sys
+import os
+import time
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fluxzero import FluidTree
+
+def build_chain(tree, length):
+    node = 0
+    for _ in range(length):
+        child = tree.create_node(node)
+        tree.add_child(node, child)
+        node = child
+    return node
+
+def test_decay():
+    print("--- Testing FluxZero Lazy Decay ---")
+    tree = FluidTree()
+    leaf = build_chain(tree, 3)
+    for _ in range(8):
+        tree.backprop(leaf, 1.0, 0.5)
+    c0 = tree.get_conductivity(leaf)
+    assert tree.get_visits(leaf) == 8
+    
+    # 1. Visits and conductivity-above-prior scale by the factor
+    tree.decay(0.5)
+    assert tree.get_visits(leaf) == 4 and tree.get_visits(0) == 4
+    assert abs(tree.get_conductivity(leaf) - (0.5 + (c0 - 0.5) * 0.5)) < 1e-12
+    tree.decay(0.5)
+    assert tree.get_visits(leaf) == 2
+    assert abs(tree.get_conductivity(leaf) - (0.5 + (c0 - 0.5) * 0.25)) < 1e-12
+    print("[PASS] Decay compounds across calls.")
+    
+    # 2. Backprop resolves lazily before learning
+    c1 = tree.get_conductivity(leaf)
+    tree.backprop(leaf, 0.0, 0.5)
+    assert tree.get_visits(leaf) == 3
+    assert abs(tree.get_conductivity(leaf) - c1 * 0.5) < 1e-12
+    print("[PASS] Backprop continues from decayed statistics.")
+    
+    # 3. Materialize / save / snapshot all see the same values
+    before = [(tree.get_visits(n), tree.get_conductivity(n)) for n in range(len(tree))]
+    tree.decay(0.75)
+    expected = [(tree.get_visits(n), tree.get_conductivity(n)) for n in range(len(tree))]
+    assert expected != before
+    snap = tree.snapshot()
+    assert [(snap.get_visits(n), snap.get_conductivity(n)) for n in range(len(tree))] == expected
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "decayed.flux")
+        tree.save(path)
+        loaded = FluidTree()
+        loaded.load(path)
+        assert [(loaded.get_visits(n), loaded.get_conductivity(n)) for n in range(len(tree))] == expected
+    tree.materialize_decay()
+    assert [(tree.get_visits(n), tree.get_conductivity(n)) for n in range(len(tree))] == expected
+    print("[PASS] Snapshot, save/load and materialize agree.")
+    
+    # 4. Repeated tiny factors renormalize instead of underflowing
+    for _ in range(5):
+        tree.decay(1e-60)
+    assert tree.get_visits(leaf) == 0
+    assert abs(tree.get_conductivity(leaf) - 0.5) < 1e-12
+    tree.backprop(leaf, 1.0, 0.5)
+    assert tree.get_visits(leaf) == 1 and abs(tree.get_conductivity(leaf) - 0.75) < 1e-12
+    print("[PASS] Global scale renormalizes.")
+    
+    try:
+        tree.decay(1.5)
+        assert False, "Factor > 1 should raise"
+    except ValueError:
+        pass
+        
+    # 5. Nodes touched every epoch keep their fractions (no rounding drift)
+    hot = FluidTree()
+    hot_leaf = build_chain(hot, 1)
+    eager = 0.0
+    for _ in range(300):
+        hot.decay(0.99)
+        hot.backprop(hot_leaf, 1.0, 0.5)
+        eager = eager * 0.99 + 1
+    print(f"Visits after 300 epochs: {hot.get_visits(hot_leaf)} (eager {eager:.2f})")
+    assert hot.get_visits(hot_leaf) == round(eager)
+    print("[PASS] Repeated decay + backprop matches eager decay.")
+    
+    # 6. O(1): decaying a large tree costs no per-node work (timing is informational)
+    big = FluidTree()
+    build_chain(big, 100000)
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        big.decay(0.99)
+    per_call = (time.perf_counter() - t0) / 1000
+    print(f"[INFO] decay() on {len(big)} nodes: {per_call * 1e6:.1f} us/call")
+
+if __name__ == "__main__":
+    test_decay()
@@ -0,0 +1,84 @@
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fluxzero import FluidTree, connect4_env
+
+def test_export():
+    print("--- Testing FluxZero Streaming Export ---")
+    tree = FluidTree()
+    tree.run_search(0, connect4_env(), 300)
+    n = len(tree)
+    children = tree.get_children(0)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # 1. CSV: header + one row per node, small chunks to cross boundaries
+        path = os.path.join(tmp, "tree.csv")
+        assert tree.export(path, chunk_size=7) == n
+        with open(path) as f:
+            rows = f.read().splitlines()
+        assert rows[0] == "id,parent,visits,conductivity,action"
+        assert len(rows) == n + 1
+        first = rows[1].split(",")
+        assert int(first[0]) == 0 and int(first[1]) == -1 and int(first[2]) == 300
+        print("[PASS] CSV export streams every node.")
+        
+        # 2. JSON-lines from a frozen snapshot
+        path = os.path.join(tmp, "tree.jsonl")
+        assert tree.snapshot().export(path) == n
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+        by_id = {r["id"]: r for r in records}
+        c = children[0]
+        assert by_id[c]["parent"] == 0
+        assert by_id[c]["visits"] == tree.get_visits(c)
+        assert by_id[c]["action"] == tree.get_action(c)
+        assert abs(by_id[c]["conductivity"] - tree.get_conductivity(c)) < 1e-9
+        print("[PASS] JSON-lines export from snapshot.")
+        
+        # 3. DOT: one edge per non-root node
+        path = os.path.join(tmp, "tree.gv")
+        assert tree.export(path, format="dot") == n
+        with open(path) as f:
+            text = f.read()
+        assert text.startswith("digraph")
+        assert text.count(" -> ") == n - 1
+        print("[PASS] DOT export.")
+        
+        try:
+            tree.export(path)
+            assert False, "Unknown extension should raise"
+        except ValueError:
+            pass
+        for bad in (lambda: tree.export(os.path.join(tmp, "zero.csv"), chunk_size=0),
+                    lambda: tree.snapshot().export(os.path.join(tmp, "neg.csv"), chunk_size=-1)):
+            try:
+                bad(); assert False, "Non-positive chunk_size should raise"
+            except ValueError:
+                pass
+            
+    # 4. Chunked NumPy iteration (optional dependency)
+    try:
+        import numpy as np
+    except ImportError:
+        print("[SKIP] NumPy not installed; iter_nodes not tested.")
+        return
+        
+    batches = list(tree.iter_nodes(chunk_size=64))
+    assert all(len(b) <= 64 for b in batches)
+    ids = np.concatenate([b["id"] for b in batches])
+    assert len(ids) == n and (ids == np.arange(n)).all()
+    visits = np.concatenate([b["visits"] for b in batches])
+    assert visits[0] == 300 and visits[c] == tree.get_visits(c)
+    snap_batches = list(tree.snapshot().iter_nodes(chunk_size=1000))
+    assert sum(len(b) for b in snap_batches) == n
+    try:
+        list(tree.iter_nodes(chunk_size=0))
+        assert False, "Non-positive chunk_size should raise"
+    except ValueError:
+        pass
+    print("[PASS] iter_nodes yields chunked record arrays.")
+
+if __name__ == "__main__":
+    test_export()
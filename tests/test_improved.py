@@ -58,6 +58,35 @@ def test_improvements():
     res = tree.traverse_fuzzy(root, [1], get_moves, tolerance=1)
     if res == c1: print("[PASS] Fuzzy Traversal (Fuzzy 1->0) worked.")
     else: print(f"[FAIL] Fuzzy 1->0 failed. Got {res}")
+    
+    # 4. Test Beam Traversal (Native)
+    # Root splits into N (0) and E (2). Only the E branch continues with 3.
+    # Input [1, 3]: greedy picks N for the ambiguous 1 and dead-ends; beam recovers.
+    beam = FluidTree()
+    n = beam.create_node(0, action=0); beam.add_child(0, n)
+    e = beam.create_node(0, action=2); beam.add_child(0, e)
+    n_tail = beam.create_node(n, action=6); beam.add_child(n, n_tail)
+    e_tail = beam.create_node(e, action=3); beam.add_child(e, e_tail)
+    
+    def beam_moves(nid):
+        return {beam.get_action(c): c for c in beam.get_children(nid)}
+    
+    greedy = beam.traverse_fuzzy(0, [1, 3], beam_moves, tolerance=1)
+    results = beam.traverse_beam(0, [1, 3], tolerance=1, beam_width=4)
+    print(f"Greedy: {greedy}, Beam: {results}")
+    assert greedy == -1
+    assert results and results[0][0] == e_tail
+    print("[PASS] Beam Traversal recovered the path greedy lost.")
+    
+    # Exact paths outrank fuzzy ones; hopeless input returns nothing
+    assert beam.traverse_beam(0, [2, 3])[0] == (e_tail, 0.5) # 2 steps x 0.5 x cond 0.5
+    assert beam.traverse_beam(0, [4, 4], tolerance=1) == []
+    
+    # Out-of-range labels/moves wrap around the compass instead of matching everything
+    wide = beam.create_node(0, action=10); beam.add_child(0, wide) # 10 = 2 (mod 8)
+    assert [r[0] for r in beam.traverse_beam(0, [0], tolerance=0)] == [n]
+    assert beam.traverse_beam(0, [-5], tolerance=0) == []                # -5 = 3 (mod 8)
+    assert sorted(r[0] for r in beam.traverse_beam(0, [-6], tolerance=0)) == [e, wide] # -6 = 2
 
 if __name__ == "__main__":
     test_improvements()
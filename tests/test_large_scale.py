@@ -0,0 +1,72 @@
+import sys
+import os
+import struct
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fluxzero import FluidTree
+
+def test_large_scale():
+    print("--- Testing FluxZero Large-Scale Storage ---")
+    
+    # 1. Reservation + growth across many arena chunks
+    tree = FluidTree()
+    tree.reserve(100000)
+    assert tree.capacity() >= 100000
+    parent = 0
+    for i in range(5000):
+        child = tree.create_node(parent)
+        tree.add_child(parent, child)
+        if i % 50 == 0: parent = child
+    tree.backprop(child, 1.0, 0.5)
+    assert len(tree) == 5001 and tree.get_visits(0) == 1
+    assert tree.path_to_root(child)[-1] == 0
+    print(f"[PASS] Grew to {len(tree)} nodes (capacity {tree.capacity()}).")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # 2. 64-bit visit counters survive a round trip (v3 file written by hand)
+        big = 3 * 2**31
+        path = os.path.join(tmp, "big.flux")
+        with open(path, "wb") as f:
+            f.write(b"FLX3" + struct.pack("<q", 2))
+            f.write(struct.pack("<qqdqiq", 0, big, 0.9, -1, -1, 1) + struct.pack("<q", 1))
+            f.write(struct.pack("<qqdqiq", 1, big, 0.9, 0, 4, 0))
+        tree = FluidTree()
+        tree.load(path)
+        assert tree.get_visits(1) == big and tree.get_action(1) == 4
+        tree.save(path)
+        again = FluidTree()
+        again.load(path)
+        assert again.get_visits(0) == big and again.get_children(0) == [1]
+        print("[PASS] 64-bit visit counts persisted.")
+        
+        # 3. Legacy 32-bit v1 files still load
+        legacy = os.path.join(tmp, "legacy.flux")
+        with open(legacy, "wb") as f:
+            f.write(b"FLUX" + struct.pack("<i", 2))
+            f.write(struct.pack("<iidii", 0, 7, 0.6, -1, 1) + struct.pack("<i", 1))
+            f.write(struct.pack("<iidii", 1, 7, 0.6, 0, 0))
+        old = FluidTree()
+        old.load(legacy)
+        assert len(old) == 2 and old.get_visits(1) == 7 and old.get_action(1) == -1
+        print("[PASS] Legacy v1 file loaded.")
+        
+        # 4. Corrupt files are rejected without touching the loaded tree
+        huge = os.path.join(tmp, "huge.flux")
+        with open(huge, "wb") as f:
+            f.write(b"FLX3" + struct.pack("<q", 2**40))
+        truncated = os.path.join(tmp, "truncated.flux")
+        with open(truncated, "wb") as f:
+            f.write(b"FLX3" + struct.pack("<q", 2))
+            f.write(struct.pack("<qqdqiq", 0, 3, 0.9, -1, -1, 1) + struct.pack("<q", 1))
+            f.write(struct.pack("<qqdqiq", 1, 3, 0.9, 0, 4, 5))  # Child list cut off
+        for bad in (huge, truncated):
+            try:
+                old.load(bad)
+                assert False, f"{bad} should not load"
+            except OSError as e:
+                print(f"    Rejected: {e}")
+            assert len(old) == 2 and old.get_visits(1) == 7 and old.get_children(0) == [1]
+        print("[PASS] Corrupt files rejected, tree kept.")
+
+if __name__ == "__main__":
+    test_large_scale()
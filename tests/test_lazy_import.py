@@ -0,0 +1,59 @@
+import sys
+import os
+import subprocess
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+def run(code, **env):
+    """Runs code in a fresh interpreter (import state must not leak between checks)."""
+    full_env = dict(os.environ, **env)
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=full_env, capture_output=True, text=True)
+
+def test_lazy_import():
+    print("--- Testing FluxZero Lazy Import ---")
+    
+    # 1. Importing loads nothing native
+    proc = run("import sys, fluxzero\n"
+               "assert fluxzero._native._lib is None\n"
+               "assert 'platform' not in sys.modules and 'ctypes' not in sys.modules\n"
+               "from fluxzero import FluidTree, MERGE_STRATEGIES\n"
+               "assert 'ctypes' not in sys.modules\n"
+               "fluxzero.FluidTree()\n"
+               "assert fluxzero._native._lib is not None\n"
+               "assert fluxzero._lib is fluxzero._native._lib\n")
+    assert proc.returncode == 0, proc.stderr
+    print("[PASS] Library is loaded on first use, not at import.")
+    
+    # 2. $FLUXZERO_LIB overrides the search; a bad path fails on use, not import
+    proc = run("import fluxzero\n"
+               "try:\n"
+               "    fluxzero.FluidTree()\n"
+               "except OSError as e:\n"
+               "    assert 'no_such_lib' in str(e)\n"
+               "else:\n"
+               "    raise SystemExit(1)\n",
+               FLUXZERO_LIB=os.path.join(ROOT, "no_such_lib.so"))
+    assert proc.returncode == 0, proc.stderr
+    
+    from fluxzero import _native
+    real = _native.library_path()
+    proc = run("import fluxzero\n"
+               "t = fluxzero.FluidTree()\n"
+               "assert fluxzero._native.library_path() == " + repr(real) + "\n"
+               "assert t.create_node(0) == 1\n",
+               FLUXZERO_LIB=real)
+    assert proc.returncode == 0, proc.stderr
+    print("[PASS] FLUXZERO_LIB override.")
+    
+    # 3. With no file found, the bare name is left to the system loader (LD_LIBRARY_PATH, ...)
+    saved_path, saved_exists = _native._lib_path, _native.os.path.exists
+    try:
+        _native._lib_path = None
+        _native.os.path.exists = lambda path: False
+        assert _native.library_path() == _native.lib_name()
+    finally:
+        _native._lib_path, _native.os.path.exists = saved_path, saved_exists
+    print("[PASS] Falls back to the system library search.")
+
+if __name__ == "__main__":
+    test_lazy_import()
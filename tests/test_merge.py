@@ -0,0 +1,120 @@
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fluxzero import FluidTree
+from fluxzero.__main__ import main as cli_main
+
+def make_shard(rewards, extra_action=None):
+    # Root 0 -> move 3 (rewarded), plus a keyed root "s" with one move
+    tree = FluidTree()
+    a = tree.create_node(0, action=3); tree.add_child(0, a)
+    for r in rewards: tree.backprop(a, r, 0.5)
+    if extra_action is not None:
+        b = tree.create_node(0, action=extra_action); tree.add_child(0, b)
+        tree.backprop(b, 1.0, 0.5)
+    s = tree.create_node(-1)
+    s_child = tree.create_node(s, action=1); tree.add_child(s, s_child)
+    tree.backprop(s_child, 1.0, 0.5)
+    tree.node_map = {'s': s}
+    return tree
+
+def test_merge():
+    print("--- Testing FluxZero Shard Merging ---")
+    a = make_shard([1.0])                    # move 3: 1 visit, cond 0.75
+    b = make_shard([0.0, 0.0], extra_action=5) # move 3: 2 visits, cond 0.125
+    
+    # 1. In-memory merge
+    merged = FluidTree()
+    merged.merge(a)
+    merged.merge(b)
+    kids = {merged.get_action(c): c for c in merged.get_children(0)}
+    print(f"Merged root children: {kids}")
+    assert set(kids) == {3, 5}
+    assert merged.get_visits(kids[3]) == 3
+    assert abs(merged.get_conductivity(kids[3]) - (0.75 * 1 + 0.125 * 2) / 3) < 1e-9
+    assert merged.get_visits(0) == 4
+    
+    # Keyed root "s" matched across shards, not duplicated
+    s = merged.node_map['s']
+    assert merged.get_visits(s) == 2 and len(merged.get_children(s)) == 1
+    assert len(merged) == 5 # 0, move 3, move 5, s, s->1
+    print("[PASS] In-memory merge matched nodes by action path.")
+    
+    # 2. Streaming CLI merge gives the same tree
+    with tempfile.TemporaryDirectory() as tmp:
+        pa, pb, out = (os.path.join(tmp, n) for n in ("a.flux", "b.flux", "out.flux"))
+        a.save(pa); b.save(pb)
+        assert cli_main(["merge", pa, pb, "-o", out]) == 0
+        
+        loaded = FluidTree()
+        loaded.load(out)
+        assert len(loaded) == 5
+        kids = {loaded.get_action(c): c for c in loaded.get_children(0)}
+        assert loaded.get_visits(kids[3]) == 3 and loaded.get_visits(loaded.node_map['s']) == 2
+        print("[PASS] Streaming 'fluxzero merge' produced the merged tree.")
+        
+        # 3. Strategies and bad input
+        alt = FluidTree(); alt.merge(a); alt.merge_file(pb, strategy="max_visits")
+        kid = {alt.get_action(c): c for c in alt.get_children(0)}[3]
+        assert abs(alt.get_conductivity(kid) - 0.125) < 1e-9
+        for bad in (lambda: alt.merge(a, strategy="bogus"),
+                    lambda: alt.merge_file(os.path.join(tmp, "missing.flux"))):
+            try:
+                bad(); assert False, "should have raised"
+            except (ValueError, OSError):
+                pass
+                
+        # The CLI checks every input before merging and reports errors
+        garbage = os.path.join(tmp, "garbage.flux")
+        with open(garbage, "wb") as f:
+            f.write(b"not a tree")
+        for inputs in ([garbage, pa], [pa, garbage], [pa, os.path.join(tmp, "missing.flux")]):
+            bad_out = os.path.join(tmp, "bad_out.flux")
+            assert cli_main(["merge", *inputs, "-o", bad_out]) == 1
+            assert not os.path.exists(bad_out)
+        assert cli_main(["export", garbage, "-o", os.path.join(tmp, "garbage.csv")]) == 1
+    print("[PASS] Strategies and error handling work.")
+    
+    # 4. Unmergeable shards fail without touching the target
+    with tempfile.TemporaryDirectory() as tmp:
+        target = make_shard([1.0])
+        before = (len(target), target.get_visits(0))
+        
+        unlabeled = make_shard([1.0])
+        x = unlabeled.create_node(0); unlabeled.add_child(0, x)
+        path = os.path.join(tmp, "unlabeled.flux")
+        unlabeled.save(path)
+        
+        truncated = os.path.join(tmp, "truncated.flux")
+        make_shard([1.0]).save(truncated)
+        with open(truncated, "rb+") as f:
+            f.truncate(os.path.getsize(truncated) - 4)
+            
+        for bad in (lambda: target.merge(unlabeled), lambda: target.merge_file(path),
+                    lambda: target.merge_file(truncated)):
+            try:
+                bad(); assert False, "should have raised"
+            except RuntimeError:
+                pass
+            assert (len(target), target.get_visits(0)) == before
+    print("[PASS] Bad shards are rejected before merging.")
+    
+    # 5. FluxAgent shards (the repo's own agent) merge move by move
+    sys.path.insert(0, os.path.dirname(__file__))
+    from play_flux_chess import Connect4, FluxAgent
+    shards = []
+    for _ in range(2):
+        agent = FluxAgent()
+        agent.get_action(Connect4(), simulations=20)
+        agent.tree.node_map = agent.node_map
+        shards.append(agent.tree)
+    merged = FluidTree()
+    merged.merge(shards[0]); merged.merge(shards[1])
+    root = merged.node_map[str(Connect4().board)]
+    assert len(merged.get_children(root)) == 7
+    assert merged.get_visits(root) == 40
+    print("[PASS] FluxAgent shards merged without duplicates.")
+
+if __name__ == "__main__":
+    test_merge()
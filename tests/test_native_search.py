@@ -0,0 +1,72 @@
+import sys
+import os
+import copy
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+from fluxzero import FluidTree, CallbackEnv, connect4_env
+
+def test_native_search():
+    print("--- Testing Native In-Engine Search ---")
+    
+    # 1. Reference Connect-4: find the immediate win
+    # Player 1 has three stones in column 0 (moves 0,1,0,1,0,1) -> column 0 wins.
+    tree = FluidTree()
+    env = connect4_env([0, 1, 0, 1, 0, 1])
+    done = tree.run_search(0, env, 2000)
+    assert done == 2000
+    
+    # The winning column erodes to full conductivity (every visit is an instant win)
+    best = max(tree.get_children(0), key=tree.get_conductivity)
+    print(f"Best move: {tree.get_action(best)} (conductivity {tree.get_conductivity(best):.3f})")
+    assert tree.get_action(best) == 0
+    assert sorted(tree.get_action(c) for c in tree.get_children(0)) == list(range(7))
+    print("[PASS] Native search found the winning column.")
+    
+    # 1b. Deeper plies are credited from the mover's side: the opponent has three
+    # stones in column 1 (moves 0,1,6,1,5,1), so the only sound move is to block it
+    tree = FluidTree()
+    tree.run_search(0, connect4_env([0, 1, 6, 1, 5, 1]), 3000)
+    assert tree.get_action(tree.get_best_child(0)) == 1
+    print("[PASS] Native search blocked the opponent's threat.")
+    
+    # 2. Threaded search keeps visit counts consistent
+    tree = FluidTree()
+    done = tree.run_search(0, connect4_env(), 4000, n_threads=4)
+    child_visits = sum(tree.get_visits(c) for c in tree.get_children(0))
+    assert done == 4000 and tree.get_visits(0) == 4000 and child_visits == 4000
+    print("[PASS] Threaded search accounted for every simulation.")
+    
+    # 2b. Hand-made children without actions cannot be replayed in the environment
+    tree = FluidTree()
+    child = tree.create_node(0)
+    tree.add_child(0, child)
+    try:
+        tree.run_search(0, connect4_env(), 10)
+        assert False, "Unlabeled edge should raise"
+    except RuntimeError as e:
+        assert "Unlabeled edge" in str(e)
+    assert tree.get_children(child) == []
+    print("[PASS] Unlabeled edges are rejected.")
+    
+    # 3. Python environment through ctypes callbacks (same result)
+    from play_flux_chess import Connect4
+    game = Connect4()
+    for m in [0, 1, 0, 1, 0, 1]: game.make_move(m)
+    me = game.player
+    
+    def terminal_value(g):
+        if g.check_win(me): return 1.0
+        if g.check_win(3 - me): return 0.0
+        if g.is_full(): return 0.5
+        return None
+    
+    tree = FluidTree()
+    py_env = CallbackEnv(game, copy.deepcopy, lambda g: g.get_valid_moves(),
+                         lambda g, m: g.make_move(m), terminal_value, to_move=lambda g: g.player)
+    tree.run_search(0, py_env, 300)
+    assert tree.get_action(max(tree.get_children(0), key=tree.get_conductivity)) == 0
+    assert not py_env._states or list(py_env._states) == [1] # Clones released
+    print("[PASS] Callback environment drove the native search.")
+
+if __name__ == "__main__":
+    test_native_search()
@@ -0,0 +1,65 @@
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fluxzero import FluidTree, connect4_env
+
+def test_snapshot():
+    print("--- Testing FluxZero Frozen Snapshots ---")
+    tree = FluidTree()
+    assert tree.current_snapshot() is None
+    tree.run_search(0, connect4_env(), 500)
+    
+    # 1. A snapshot answers like the live tree
+    snap = tree.snapshot()
+    children = tree.get_children(0)
+    assert len(snap) == len(tree)
+    assert snap.get_children(0) == children
+    assert snap.get_best_child(0) == tree.get_best_child(0)
+    assert snap.get_visits(0) == tree.get_visits(0) == 500
+    leaf = tree.subtree_ids(0)[-1]
+    assert snap.path_to_root(leaf) == tree.path_to_root(leaf)
+    assert snap.get_action(children[0]) == tree.get_action(children[0])
+    print("[PASS] Snapshot mirrors the live tree.")
+    
+    # 2. Frozen: training continues without touching it
+    tree.run_search(0, connect4_env(), 500)
+    assert snap.get_visits(0) == 500 and tree.get_visits(0) == 1000
+    print("[PASS] Snapshot unaffected by further training.")
+    
+    # 3. RCU publish: readers keep their version while new ones appear
+    v1 = tree.publish()
+    held = tree.current_snapshot()
+    errors = []
+    
+    def reader():
+        for _ in range(200):
+            s = tree.current_snapshot()
+            best = s.get_best_child(0)
+            if best not in s.get_children(0): errors.append(best)
+            
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for t in readers: t.start()
+    for _ in range(5):
+        tree.run_search(0, connect4_env(), 100)
+        assert tree.snapshot().version == 0 # Unpublished copies don't use up versions
+        tree.publish()
+    for t in readers: t.join()
+    
+    assert not errors
+    assert held.version == v1 and held.get_visits(0) == 1000
+    assert tree.current_snapshot().version == v1 + 5
+    assert tree.current_snapshot().get_visits(0) == 1500
+    print("[PASS] Published snapshots swapped atomically under concurrent readers.")
+    
+    # 4. Concurrent publishers never leave an older version current
+    def publisher():
+        for _ in range(50): tree.publish()
+    publishers = [threading.Thread(target=publisher) for _ in range(4)]
+    for t in publishers: t.start()
+    for t in publishers: t.join()
+    assert tree.current_snapshot().version == v1 + 5 + 200
+    print("[PASS] Concurrent publishes keep the newest version current.")
+
+if __name__ == "__main__":
+    test_snapshot()